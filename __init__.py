@@ -7,11 +7,15 @@ Technical Blog: www.dataeast.cn
 Last Updated: 2025-11-15
 """
 
+import os
+
 from .nodes import NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS
 
 __all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS', 'WEB_DIRECTORY']
 
 WEB_DIRECTORY = "./web"
 
-print(f'\033[34m[ComfyUI-SiberiaNodes]\033[0m Loaded successfully with {len(NODE_CLASS_MAPPINGS)} nodes')
-print(f'\033[34m[ComfyUI-SiberiaNodes]\033[0m Web directory: {WEB_DIRECTORY}')
\ No newline at end of file
+# 设置 SIBERIA_QUIET 可关闭加载信息 / Set SIBERIA_QUIET to silence the load banner
+if not os.environ.get("SIBERIA_QUIET"):
+    print('\033[34m[ComfyUI-SiberiaNodes]\033[0m Loaded successfully with', len(NODE_CLASS_MAPPINGS), 'nodes')
+    print('\033[34m[ComfyUI-SiberiaNodes]\033[0m Web directory:', WEB_DIRECTORY)
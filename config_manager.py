@@ -8,9 +8,30 @@ Last Updated: 2025-11-15
 """
 
 import yaml
+import json
 import os
+import pickle
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 优先使用libyaml的C加载器 / Prefer libyaml's C loader when available
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+# 已解析配置缓存，键为 (路径, mtime_ns, 大小) / Parsed config cache keyed by (path, mtime_ns, size)
+_CONFIG_CACHE: Dict[Tuple[str, int, int], Dict] = {}
+
+# 派生视图缓存，键为 (配置缓存键, 视图名) / Derived view cache keyed by (config cache key, view name)
+_DERIVED_CACHE: Dict[Tuple[Tuple[str, int, int], str], object] = {}
+
+# 保护上述两个缓存，事件循环和执行器线程会并发访问 / Guards both caches, accessed concurrently by the event loop and executor threads
+_CACHE_LOCK = threading.Lock()
 
 
 class manager:
@@ -19,10 +40,21 @@ class manager:
     负责读取Ollama服务器配置 / Handles reading Ollama server configuration
     """
 
+    # 最近使用服务器的最小写入间隔(秒) / Minimum interval between last-used-server writes (seconds)
+    LAST_SERVER_FLUSH_INTERVAL = 5.0
+
     def __init__(self):
         # 配置文件路径 / Configuration file path
         self.config_dir = Path(__file__).parent
         self.config_file = self.config_dir / "config.yaml"
+        # 预编译的配置缓存文件 / Precompiled configuration cache file
+        self._compiled_path = self.config_dir / "config.compiled.pkl"
+        # 最近使用服务器的JSON文件，load_config不读取 / Last used server JSON sidecar, ignored by load_config
+        self._last_server_file = self.config_dir / "last_server.json"
+        self._last_used_server = None
+        self._last_flush = 0.0
+        self._flush_timer = None
+        self._flush_lock = threading.Lock()
         self.default_config = {
             "ollama_servers": [
                 {
@@ -32,55 +64,220 @@ class manager:
             ]
         }
 
+    def _config_cache_key(self) -> Tuple[str, int, int]:
+        """计算配置缓存键 / Compute configuration cache key"""
+        path = str(self.config_file)
+        try:
+            st = self.config_file.stat()
+        except FileNotFoundError:
+            # 文件不存在时使用哨兵mtime / Sentinel mtime when file is missing
+            return (path, -1, -1)
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def config_mtime_ns(self) -> int:
+        """获取配置文件mtime，文件不存在时为-1 / Get config file mtime, -1 if the file is missing"""
+        return self._config_cache_key()[1]
+
     def load_config(self) -> Dict:
-        """加载YAML配置文件 / Load YAML configuration file"""
+        """
+        加载YAML配置文件 / Load YAML configuration file
+
+        解析结果按文件mtime缓存，未修改时仅需一次stat / Parsed result is cached by file mtime,
+        an unchanged file costs a single stat
+        """
         try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
+            key = self._config_cache_key()
+            cached = _CONFIG_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+            if key[1] != -1:
+                config = self._load_compiled(key)
+                if config is None:
+                    # 一次读取全部字节，由YAML解析器处理UTF-8 / Read all bytes at once, the YAML parser handles UTF-8
+                    with open(self.config_file, 'rb') as f:
+                        data = f.read()
+                    config = yaml.load(data, Loader=_YamlLoader)
 
-                # 确保配置结构完整 / Ensure configuration structure is complete
-                if not config:
-                    config = self.default_config.copy()
-                if "ollama_servers" not in config:
-                    config["ollama_servers"] = self.default_config["ollama_servers"]
+                    # 确保配置结构完整 / Ensure configuration structure is complete
+                    if not config:
+                        config = self.default_config.copy()
+                    if "ollama_servers" not in config:
+                        config["ollama_servers"] = self.default_config["ollama_servers"]
 
-                return config
+                    self._save_compiled(key, config)
             else:
                 # 如果配置文件不存在，返回默认配置 / Return default config if file doesn't exist
-                return self.default_config
+                config = self.default_config
+
+            # 清除同一路径的旧缓存 / Drop stale entries for the same path
+            with _CACHE_LOCK:
+                for stale_key in [k for k in _CONFIG_CACHE if k[0] == key[0]]:
+                    _CONFIG_CACHE.pop(stale_key, None)
+                _CONFIG_CACHE[key] = config
+
+            return config
         except Exception as e:
             print(f"配置文件加载失败，使用默认配置 / Failed to load config, using default: {e}")
             return self.default_config
 
+    def _load_compiled(self, key: Tuple[str, int, int]) -> Optional[Dict]:
+        """读取预编译配置，源文件已修改时返回None / Read precompiled config, None if source changed"""
+        try:
+            with open(self._compiled_path, 'rb') as f:
+                compiled = pickle.load(f)
+        except Exception:
+            return None
+
+        if not isinstance(compiled, dict) or compiled.get("source") != key[1:]:
+            return None
+        return compiled.get("config")
+
+    def _save_compiled(self, key: Tuple[str, int, int], config: Dict) -> None:
+        """原子写入预编译配置 / Atomically write precompiled config"""
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.config_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({"source": key[1:], "config": config}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._compiled_path)
+        except Exception as e:
+            # 只读安装目录等情况下忽略 / Ignore e.g. read-only install directories
+            print(f"Warning: Failed to write compiled config cache: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def _derived(self, name: str, build: Callable[[], object]):
+        """按配置mtime缓存派生视图 / Memoize a derived view by config mtime"""
+        key = self._config_cache_key()
+        cache_key = (key, name)
+        value = _DERIVED_CACHE.get(cache_key)
+        if value is None:
+            # 构建时不持锁，build 会再次读取配置 / Build outside the lock, build() reads the config again
+            value = build()
+            with _CACHE_LOCK:
+                # 清除同一路径的旧视图 / Drop stale views for the same path
+                for stale_key in [k for k in _DERIVED_CACHE if k[0][0] == key[0] and k[0] != key]:
+                    _DERIVED_CACHE.pop(stale_key, None)
+                _DERIVED_CACHE[cache_key] = value
+        return value
+
     def get_servers(self) -> List[Dict]:
         """获取所有服务器列表 / Get all servers list"""
-        config = self.load_config()
-        return config.get("ollama_servers", [])
+        return self._derived("servers", lambda: self.load_config().get("ollama_servers", []))
 
-    
-    def get_server_options(self) -> List[Dict]:
-        """获取服务器选项列表，用于ComfyUI下拉菜单 / Get server options list for ComfyUI dropdown"""
-        return self.get_servers()
+    # 服务器选项列表，用于ComfyUI下拉菜单 / Server options list for ComfyUI dropdown
+    get_server_options = get_servers
 
-    def get_server_display_options(self) -> List[str]:
-        """获取服务器显示选项列表，用于ComfyUI下拉菜单显示 / Get server display options for ComfyUI dropdown"""
-        servers = self.get_servers()
-        options = []
+    def get_server_display_options(self, servers: Optional[List[Dict]] = None) -> List[str]:
+        """
+        获取服务器显示选项列表，用于ComfyUI下拉菜单显示 / Get server display options for ComfyUI dropdown
 
-        for server in servers:
+        Args:
+            servers: 已获取的服务器列表，为None时读取配置
+        """
+        if servers is not None:
             # 使用服务器名称作为显示 / Use server name for display
-            options.append(server['name'])
+            return [server['name'] for server in servers]
+
+        return self._derived("display_options", lambda: self.get_server_display_options(self.get_servers()))
+
+    def get_server_name_to_url(self) -> Dict[str, str]:
+        """获取服务器名称到URL的映射 / Get server name to URL mapping"""
+        def build():
+            mapping = {}
+            for server in self.get_servers():
+                # 重名时保留第一个，与原线性查找一致 / Keep the first on duplicates, matching linear search
+                mapping.setdefault(server.get('name'), server.get('url'))
+            return mapping
+
+        return self._derived("name_to_url", build)
+
+    def get_server_url_to_name(self) -> Dict[str, str]:
+        """获取服务器URL到名称的映射 / Get server URL to name mapping"""
+        def build():
+            mapping = {}
+            for server in self.get_servers():
+                mapping.setdefault(server.get('url'), server.get('name'))
+            return mapping
+
+        return self._derived("url_to_name", build)
+
+    def get_default_server(self, servers: Optional[List[Dict]] = None) -> str:
+        """
+        获取默认服务器 / Get default server
+
+        Args:
+            servers: 已获取的服务器列表，为None时读取配置
+        """
+        if servers is not None:
+            # 使用第一个服务器，否则返回默认URL / Use first server, otherwise the default URL
+            return servers[0]['url'] if servers else "http://127.0.0.1:11434"
+
+        return self._derived("default_server", lambda: self.get_default_server(self.get_servers()))
+
+    def set_last_used_server(self, url: str) -> None:
+        """
+        记录最近使用的服务器，写入会被合并 / Record the last used server, writes are debounced
+
+        Args:
+            url: 服务器URL
+        """
+        with self._flush_lock:
+            if url == self._last_used_server:
+                return
+            self._last_used_server = url
+
+            delay = self.LAST_SERVER_FLUSH_INTERVAL - (time.monotonic() - self._last_flush)
+            if delay <= 0:
+                self._flush_last_used_server()
+            elif self._flush_timer is None:
+                # 间隔内只安排一次延迟写入 / Schedule a single deferred write within the interval
+                self._flush_timer = threading.Timer(delay, self._deferred_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def get_last_used_server(self) -> Optional[str]:
+        """获取最近使用的服务器 / Get the last used server"""
+        if self._last_used_server is None:
+            try:
+                with open(self._last_server_file, 'r', encoding='utf-8') as f:
+                    self._last_used_server = json.load(f).get("url")
+            except Exception:
+                return None
+        return self._last_used_server
+
+    def _deferred_flush(self) -> None:
+        """延迟写入回调 / Deferred write callback"""
+        with self._flush_lock:
+            self._flush_timer = None
+            self._flush_last_used_server()
+
+    def _flush_last_used_server(self) -> None:
+        """原子写入最近使用的服务器，调用方需持有锁 / Atomically write the last used server, caller holds the lock"""
+        self._last_flush = time.monotonic()
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.config_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"url": self._last_used_server}, f)
+            os.replace(tmp_path, self._last_server_file)
+        except Exception as e:
+            print(f"Warning: Failed to save last used server: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
 
-        return options
 
-    def get_default_server(self) -> str:
-        """获取默认服务器 / Get default server"""
-        servers = self.get_servers()
+# 进程级共享实例 / Process-wide shared instance
+_default_manager = manager()
 
-        # 使用第一个服务器 / Use first server
-        if servers:
-            return servers[0]['url']
 
-        # 返回默认URL / Return default URL
-        return "http://127.0.0.1:11434"
\ No newline at end of file
+def get_manager() -> manager:
+    """获取共享的配置管理器 / Get the shared configuration manager"""
+    return _default_manager
@@ -8,6 +8,55 @@ Last Updated: 2025-11-15
 """
 
 from .ollama_sdk_client import SiberiaOllamaSDKClient
+from .progress import make_progress_callback
+
+
+# 静态输入定义，ComfyUI只读使用 / Static input definition, treated as read-only by ComfyUI
+_CHAT_INPUT_TYPES = {
+    "required": {
+        "message": ("STRING", {
+            "multiline": True,
+            "default": "Hello!",
+            "tooltip": "用户消息 / User Message"
+        }),
+        "clear_history": ("BOOLEAN", {
+            "default": False,
+            "tooltip": "清除历史记录 / Clear History"
+        }),
+    },
+    "optional": {
+        "connection": ("OLLAMA_CONNECTION", {
+            "forceInput": False,
+            "tooltip": "Ollama连接 / Ollama Connection"
+        }),
+        "temperature": ("FLOAT", {
+            "default": 0.7,
+            "min": 0.1,
+            "max": 1.0,
+            "step": 0.1,
+            "tooltip": "生成温度 / Generation Temperature"
+        }),
+        "max_tokens": ("INT", {
+            "default": 4096,
+            "min": 1024,
+            "max": 32768,
+            "tooltip": "最大生成tokens / Maximum Generation Tokens"
+        }),
+        "language": (["中文", "English"], {
+            "default": "中文",
+            "tooltip": "语言 / Language"
+        }),
+    },
+    "hidden": {
+        "unique_id": "UNIQUE_ID",
+    },
+}
+
+# 按语言预构建的系统消息 / Prebuilt system messages per language
+_SYSTEM_MESSAGES = {
+    "中文": {"role": "system", "content": "请使用中文进行对话。"},
+    "English": {"role": "system", "content": "Please use English for conversation."},
+}
 
 
 class SiberiaOllamaChatNode:
@@ -15,47 +64,17 @@ class SiberiaOllamaChatNode:
     Siberia Ollama Chat Node - 聊天对话节点 / Chat Conversation Node
     """
 
+    __slots__ = ('chat_history',)
+
+    # 保留的最大对话轮数 / Maximum number of conversation turns kept
+    MAX_HISTORY_TURNS = 20
+
     def __init__(self):
         self.chat_history = []
 
     @classmethod
     def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "message": ("STRING", {
-                    "multiline": True,
-                    "default": "Hello!",
-                    "tooltip": "用户消息 / User Message"
-                }),
-                "clear_history": ("BOOLEAN", {
-                    "default": False,
-                    "tooltip": "清除历史记录 / Clear History"
-                }),
-            },
-            "optional": {
-                "connection": ("OLLAMA_CONNECTION", {
-                    "forceInput": False,
-                    "tooltip": "Ollama连接 / Ollama Connection"
-                }),
-                "temperature": ("FLOAT", {
-                    "default": 0.7,
-                    "min": 0.1,
-                    "max": 1.0,
-                    "step": 0.1,
-                    "tooltip": "生成温度 / Generation Temperature"
-                }),
-                "max_tokens": ("INT", {
-                    "default": 4096,
-                    "min": 1024,
-                    "max": 32768,
-                    "tooltip": "最大生成tokens / Maximum Generation Tokens"
-                }),
-                "language": (["中文", "English"], {
-                    "default": "中文",
-                    "tooltip": "语言 / Language"
-                }),
-            },
-        }
+        return _CHAT_INPUT_TYPES
 
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("回复 / Response",)
@@ -63,11 +82,11 @@ class SiberiaOllamaChatNode:
     CATEGORY = "Siberia Nodes/Ollama"
 
     @classmethod
-    def IS_CHANGED(cls, message, clear_history, connection=None, temperature=0.7, max_tokens=4096, language="中文"):
+    def IS_CHANGED(cls, message, clear_history, connection=None, temperature=0.7, max_tokens=4096, language="中文", unique_id=None):
         """ComfyUI动态更新机制 / ComfyUI Dynamic Update Mechanism"""
         return False
 
-    def chat(self, message, clear_history, connection=None, temperature=0.7, max_tokens=4096, language="中文"):
+    def chat(self, message, clear_history, connection=None, temperature=0.7, max_tokens=4096, language="中文", unique_id=None):
         # 使用Ollama SDK客户端 / Use Ollama SDK client
         client = SiberiaOllamaSDKClient.from_connection_info(connection)
 
@@ -76,19 +95,19 @@ class SiberiaOllamaChatNode:
             self.chat_history = []
 
         # 准备消息 / Prepare messages
-        if language == "中文":
-            system_content = "请使用中文进行对话。"
-        else:
-            system_content = "Please use English for conversation."
-        messages = [{"role": "system", "content": system_content}]
-        messages.extend(self.chat_history)
-        messages.append({"role": "user", "content": message})
+        system_message = _SYSTEM_MESSAGES.get(language, _SYSTEM_MESSAGES["English"])
+        messages = [system_message, *self.chat_history, {"role": "user", "content": message}]
 
         # 使用客户端进行聊天 / Use client for chat
-        response_text, _, updated_messages = client.chat(messages, temperature=temperature, max_tokens=max_tokens)
+        response_text, _, updated_messages = client.chat(
+            messages, temperature=temperature, max_tokens=max_tokens,
+            on_token=make_progress_callback(unique_id)
+        )
 
         # 更新聊天历史 / Update chat history
         if response_text and not response_text.startswith("Error"):
-            self.chat_history = updated_messages
+            # 不保存系统消息，并限制历史长度 / Drop the system message and bound history length
+            self.chat_history = updated_messages[1:][-2 * self.MAX_HISTORY_TURNS:]
 
-        return (response_text,)
\ No newline at end of file
+        # 返回完整回复覆盖流式推送的部分文本 / Return the full reply so it replaces the last partial push
+        return {"ui": {"text": [response_text]}, "result": (response_text,)}
\ No newline at end of file
@@ -7,15 +7,8 @@ Technical Blog: www.dataeast.cn
 Last Updated: 2025-11-15
 """
 
-import os
-import sys
-import pathlib
-
-# Add parent directory to path for imports
-sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
-
-from .ollama_sdk_client import SiberiaOllamaSDKClient
-from ..config_manager import manager
+from .ollama_sdk_client import get_cached_client
+from ..config_manager import get_manager
 
 
 class SiberiaOllamaConnector:
@@ -23,27 +16,39 @@ class SiberiaOllamaConnector:
     Siberia Ollama Connector - 连接到Ollama服务器 / Connect to Ollama Server
     """
 
+    __slots__ = ('_last_server_url', '_last_available_models', '_last_connected', '_last_timeout',
+                 '_last_model', '_last_server_name', '_last_connection_info', '_config_manager')
+
     def __init__(self):
         self._last_server_url = ""
         self._last_available_models = []
         self._last_connected = False
-        self._config_manager = manager()
+        self._last_timeout = 30
+        self._last_model = None
+        self._last_server_name = None
+        self._last_connection_info = None
+        self._config_manager = get_manager()
+
+    # INPUT_TYPES缓存 (配置mtime, 结果) / INPUT_TYPES cache as (config mtime, result)
+    _input_types_cache = None
 
     @classmethod
     def INPUT_TYPES(cls):
-        config_manager = manager()
+        config_manager = get_manager()
+
+        # 配置未修改时直接返回缓存 / Return the cached dict while the config is unchanged
+        mtime = config_manager.config_mtime_ns()
+        cached = cls._input_types_cache
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
 
-        # 获取服务器选项 / Get server options
-        servers = config_manager.get_server_options()
-        server_display_options = config_manager.get_server_display_options()
+        # 获取服务器选项，只读取一次列表 / Get server options, reading the list only once
+        servers = config_manager.get_servers()
+        server_display_options = config_manager.get_server_display_options(servers)
 
         # 获取默认服务器名称 / Get default server name
-        default_server_url = config_manager.get_default_server()
-        default_server_name = None
-        for server in servers:
-            if server['url'] == default_server_url:
-                default_server_name = server['name']
-                break
+        default_server_url = config_manager.get_default_server(servers)
+        default_server_name = config_manager.get_server_url_to_name().get(default_server_url)
         if not default_server_name and server_display_options:
             default_server_name = server_display_options[0]
 
@@ -56,7 +61,7 @@ class SiberiaOllamaConnector:
             if not default_server_name:
                 default_server_name = "Local Server / 本地服务器"
 
-        return {
+        input_types = {
             "required": {
                 "server_name": (server_display_options, {
                     "default": default_server_name or server_display_options[0],
@@ -76,6 +81,9 @@ class SiberiaOllamaConnector:
             },
         }
 
+        cls._input_types_cache = (mtime, input_types)
+        return input_types
+
     RETURN_TYPES = ("OLLAMA_CONNECTION",)
     RETURN_NAMES = ("连接 / Connection",)
     FUNCTION = "connect_ollama"
@@ -103,15 +111,10 @@ class SiberiaOllamaConnector:
         """连接到Ollama服务器 / Connect to Ollama server"""
         try:
             # Convert server name to URL
-            config_manager = manager()
-            servers = config_manager.get_server_options()
-            server_url = None
+            config_manager = get_manager()
 
             # Find URL corresponding to server name
-            for server in servers:
-                if server.get('name') == server_name:
-                    server_url = server.get('url')
-                    break
+            server_url = config_manager.get_server_name_to_url().get(server_name)
 
             # If no corresponding URL found, use default
             if not server_url:
@@ -121,14 +124,20 @@ class SiberiaOllamaConnector:
             # Validate timeout
             timeout = max(5, min(300, int(timeout)))
 
+            # Reuse the last connection when nothing changed since a successful call
+            if (model != "刷新 / refresh" and self._last_connected and self._last_connection_info
+                    and (server_name, server_url, model, timeout) ==
+                    (self._last_server_name, self._last_server_url, self._last_model, self._last_timeout)):
+                return (dict(self._last_connection_info, server_changed=False),)
+
             # Check if server changed
             server_changed = server_url != self._last_server_url
             if server_changed:
                 print(f"Server changed from {self._last_server_url} to {server_url}")
 
-            # Use Ollama SDK client
-            client = SiberiaOllamaSDKClient(server_url, model, timeout)
-            connection_success = client.test_connection()
+            # Use Ollama SDK client, sharing recently fetched model lists
+            client, _ = get_cached_client(server_url, model, timeout)
+            connection_success = client.connected
 
             # Save last used server URL
             try:
@@ -136,54 +145,28 @@ class SiberiaOllamaConnector:
             except Exception as config_error:
                 print(f"Warning: Failed to save last used server: {config_error}")
 
+            available = client.available_models
+
             # Update internal state
             self._last_server_url = server_url
             self._last_timeout = timeout
-            self._last_available_models = client.available_models.copy()
+            self._last_available_models = available
             self._last_connected = connection_success
 
-            # Enhanced model selection logic
-            actual_model = model
-            auto_selected = False
+            # Model selection: keep the requested model when the server has it,
+            # otherwise fall back to the first available one
+            wanted = None if model == "刷新 / refresh" else model
 
-            if model == "刷新 / refresh":
-                # When refresh selected, use first available model
-                if client.available_models:
-                    client.model = client.available_models[0]
-                    actual_model = client.available_models[0]
-                    auto_selected = True
-                    print(f"Auto-selected first available model: {actual_model}")
-                else:
-                    # No models available - keep as refresh
-                    client.model = "refresh"
-                    actual_model = "refresh"
-                    print("No models available, keeping refresh mode")
-            elif server_changed and connection_success:
-                # When server changed and connection successful, auto-select first model if current model is not available
-                if model not in client.available_models:
-                    if client.available_models:
-                        client.model = client.available_models[0]
-                        actual_model = client.available_models[0]
-                        auto_selected = True
-                        print(f"Server changed - auto-switched to first available model: {actual_model}")
-                    else:
-                        print("Server changed but no models available")
-                else:
-                    # Keep user's model if it's available on new server
-                    client.model = model
-                    print(f"Server changed - keeping user's model: {model}")
+            if wanted in available:
+                actual_model, auto_selected = wanted, False
+            elif available:
+                actual_model, auto_selected = available[0], True
+                print(f"Auto-selected first available model: {actual_model}")
             else:
-                # Use user-selected model
-                client.model = model
-                if model not in client.available_models and client.available_models:
-                    print(f"Warning: Model '{model}' not found in available models")
-                    # Auto-select first available model
-                    client.model = client.available_models[0]
-                    actual_model = client.available_models[0]
-                    auto_selected = True
-                    print(f"Auto-switching to: {actual_model}")
-                elif not client.available_models:
-                    print("No available models to switch to")
+                # No models available - keep user's model, or refresh mode
+                actual_model, auto_selected = wanted or "refresh", False
+
+            client.model = actual_model
 
             # Create connection info
             connection_info = client.to_connection_info()
@@ -195,9 +178,13 @@ class SiberiaOllamaConnector:
                 "connection_status": "connected" if connection_success else "failed",
                 "server_changed": server_changed,
                 "auto_selected": auto_selected,
-                "available_models_count": len(client.available_models)
+                "available_models_count": len(available)
             })
 
+            self._last_model = model
+            self._last_server_name = server_name
+            self._last_connection_info = connection_info
+
             return (connection_info,)
 
         except Exception as e:
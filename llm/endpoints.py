@@ -7,14 +7,84 @@ Technical Blog: www.dataeast.cn
 Last Updated: 2025-11-15
 """
 
-import sys
-import pathlib
+import asyncio
+import functools
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from aiohttp import web
 
-from .ollama_sdk_client import SiberiaOllamaSDKClient
-from ..config_manager import manager
+from .ollama_sdk_client import (
+    SiberiaOllamaSDKClient,
+    get_cached_client,
+    get_last_good_models,
+    refresh_cached_client
+)
+from ..config_manager import get_manager
+
+
+# 正在后台刷新的服务器 / Servers with a background refresh in flight
+_REFRESHING = set()
+
+# 每个服务器的探测锁及等待数，键为标准化URL，无等待者时移除
+# Per-server probe locks and waiter counts coalescing concurrent cold probes, keyed by normalized URL and dropped once idle
+_PROBE_LOCKS = {}
+
+
+def _refresh_in_background(server_url):
+    """在线程池中刷新模型列表缓存 / Refresh the model list cache on the thread pool"""
+    if server_url in _REFRESHING:
+        return
+    _REFRESHING.add(server_url)
+
+    def refresh():
+        try:
+            refresh_cached_client(SiberiaOllamaSDKClient(server_url))
+        finally:
+            _REFRESHING.discard(server_url)
+
+    asyncio.get_running_loop().run_in_executor(None, refresh)
+
+
+async def _get_models_client(server_url):
+    """
+    获取模型列表客户端，过期缓存先返回再后台刷新 / Get a client for model listing,
+    serving a stale cache entry immediately while refreshing it in the background
+
+    同步的SDK探测在线程池中执行，不阻塞事件循环 / The synchronous SDK probe runs on the
+    thread pool so it never blocks the event loop
+    """
+    loop = asyncio.get_running_loop()
+    key = SiberiaOllamaSDKClient._normalize_server_url(server_url)
+    entry = _PROBE_LOCKS.get(key)
+    if entry is None:
+        entry = _PROBE_LOCKS[key] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            client, fresh = await loop.run_in_executor(
+                None, functools.partial(get_cached_client, key, allow_stale=True)
+            )
+    finally:
+        # 只在事件循环线程中修改，无需额外加锁 / Only touched on the event loop thread, no extra locking needed
+        entry[1] -= 1
+        if entry[1] == 0 and _PROBE_LOCKS.get(key) is entry:
+            del _PROBE_LOCKS[key]
+    if not fresh:
+        _refresh_in_background(client.server_url)
+    return client
+
+
+def _get_stale_models(client):
+    """
+    连接失败时获取最近一次成功的模型列表并触发后台刷新 / On connection failure, get the last
+    good model list and trigger a background refresh
+
+    Returns:
+        最近一次成功的模型列表，没有时返回None / Last good model list, or None if there is none
+    """
+    models = get_last_good_models(client.server_url)
+    if models is not None:
+        _refresh_in_background(client.server_url)
+    return models
 
 
 def register_endpoints(PromptServer):
@@ -28,20 +98,23 @@ def register_endpoints(PromptServer):
             data = await request.json()
             server_url = data.get("server_url", "http://127.0.0.1:11434")
 
-            # Create temporary client to fetch models using SDK
-            client = SiberiaOllamaSDKClient(server_url)
-            print(f"Using Ollama SDK client for server: {server_url}")
-
-            connection_success = client.test_connection()
+            # Fetch models using SDK, sharing recently fetched model lists
+            client = await _get_models_client(server_url)
 
             if client.connected:
-                from aiohttp import web
                 return web.json_response({
                     "models": client.available_models,
                     "success": True
                 })
+
+            stale_models = _get_stale_models(client)
+            if stale_models is not None:
+                return web.json_response({
+                    "models": stale_models,
+                    "success": True,
+                    "stale": True
+                })
             else:
-                from aiohttp import web
                 return web.json_response({
                     "models": [],
                     "success": False,
@@ -49,7 +122,6 @@ def register_endpoints(PromptServer):
                 })
 
         except Exception as e:
-            from aiohttp import web
             return web.json_response({
                 "models": [],
                 "success": False,
@@ -62,7 +134,6 @@ def register_endpoints(PromptServer):
         try:
             # Validate JSON data
             if not request.content_type or 'application/json' not in request.content_type:
-                from aiohttp import web
                 return web.json_response({
                     "models": [],
                     "success": False,
@@ -71,7 +142,6 @@ def register_endpoints(PromptServer):
 
             data = await request.json()
             if not isinstance(data, dict):
-                from aiohttp import web
                 return web.json_response({
                     "models": [],
                     "success": False,
@@ -80,7 +150,6 @@ def register_endpoints(PromptServer):
 
             server_name = data.get("server_name", "").strip()
             if not server_name:
-                from aiohttp import web
                 return web.json_response({
                     "models": [],
                     "success": False,
@@ -88,28 +157,19 @@ def register_endpoints(PromptServer):
                 }, status=400)
 
             # Convert server name to URL
-            config_manager = manager()
-            servers = config_manager.get_server_options()
-            server_url = None
-
-            for server in servers:
-                if server.get('name') == server_name:
-                    server_url = server.get('url')
-                    break
+            config_manager = get_manager()
+            server_url = config_manager.get_server_name_to_url().get(server_name)
 
             # Fallback to default URL if server not found
             if not server_url:
                 server_url = "http://127.0.0.1:11434"
                 print(f"Warning: Server '{server_name}' not found in config, using default URL")
 
-            # Create temporary client to fetch models using SDK
-            client = SiberiaOllamaSDKClient(server_url)
-            print(f"Using Ollama SDK client for server: {server_url}")
-
-            connection_success = client.test_connection()
+            # Fetch models using SDK, sharing recently fetched model lists
+            client = await _get_models_client(server_url)
+            connection_success = client.connected
 
             if connection_success:
-                from aiohttp import web
                 return web.json_response({
                     "models": client.available_models,
                     "success": True,
@@ -117,8 +177,18 @@ def register_endpoints(PromptServer):
                     "server_url": server_url,
                     "model_count": len(client.available_models)
                 })
+
+            stale_models = _get_stale_models(client)
+            if stale_models is not None:
+                return web.json_response({
+                    "models": stale_models,
+                    "success": True,
+                    "stale": True,
+                    "server_name": server_name,
+                    "server_url": server_url,
+                    "model_count": len(stale_models)
+                })
             else:
-                from aiohttp import web
                 return web.json_response({
                     "models": [],
                     "success": False,
@@ -128,7 +198,6 @@ def register_endpoints(PromptServer):
                 })
 
         except Exception as client_error:
-                from aiohttp import web
                 return web.json_response({
                     "models": [],
                     "success": False,
@@ -139,7 +208,6 @@ def register_endpoints(PromptServer):
 
         except Exception as e:
             print(f"Error in get_models_by_name_endpoint: {type(e).__name__}: {e}")
-            from aiohttp import web
             return web.json_response({
                 "models": [],
                 "success": False,
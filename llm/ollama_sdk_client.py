@@ -7,23 +7,227 @@ Technical Blog: www.dataeast.cn
 Last Updated: 2025-11-15
 """
 
+import asyncio
+import atexit
+import functools
+import hashlib
+import importlib.util
 import re
-import tempfile
 import os
 import base64
 import io
-from typing import Dict, List, Tuple, Optional, Union
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterable, Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Union
 import torch
 import numpy as np
-from ollama import Client, ResponseError, RequestError
+import httpx
+from ollama import AsyncClient, Client, ResponseError, RequestError
 
 try:
     from PIL import Image
     PIL_AVAILABLE = True
+    # Pillow 9.1+ 提供 Image.Resampling / Pillow 9.1+ moved filters into Image.Resampling
+    _BILINEAR = getattr(getattr(Image, 'Resampling', Image), 'BILINEAR')
 except ImportError:
     PIL_AVAILABLE = False
     print("Warning: PIL not available, image processing will be limited")
 
+try:
+    # 可选的 imagecodecs 提供更快的PNG编码 / Optional imagecodecs provides a faster PNG encoder
+    from imagecodecs import png_encode as _png_encode
+except ImportError:
+    _png_encode = None
+
+
+# 模型列表缓存 / Model list cache: server_url -> (timestamp, available models, connected)
+_MODELS_CACHE: Dict[str, Tuple[float, List[str], bool]] = {}
+
+# 模型列表缓存有效期(秒) / Model list cache TTL (seconds)
+MODELS_CACHE_TTL = 10.0
+
+# 成功连接的复用有效期(秒) / TTL for reusing a successful connection probe (seconds)
+CONNECTION_CACHE_TTL = 30.0
+
+# 失败探测的退避状态 / Backoff state after failed probes: server_url -> (last probe time, current delay)
+_PROBE_BACKOFF: Dict[str, Tuple[float, float]] = {}
+PROBE_BACKOFF_INITIAL = 1.0
+PROBE_BACKOFF_MAX = 30.0
+
+# 最近一次成功获取的模型列表 / Last successfully fetched model list per server_url
+_LAST_GOOD_MODELS: Dict[str, List[str]] = {}
+
+# 共享的Ollama SDK客户端池，复用keep-alive连接 / Shared Ollama SDK client pool reusing keep-alive connections
+_CLIENT_POOL: Dict[Tuple[str, int], Client] = {}
+_POOL_LOCK = threading.Lock()
+
+# 连接池限制 / Connection pool limits
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
+
+# 连接层错误，发生时丢弃共享客户端重新建连 / Transport-level errors that discard the shared client so it reconnects
+_TRANSPORT_ERRORS = (httpx.TransportError, ConnectionError)
+
+# 安装了 h2 时启用HTTP/2，HTTPS反向代理后可多路复用 / Enable HTTP/2 when h2 is installed, multiplexing behind HTTPS proxies
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _http_options(timeout: int) -> Dict:
+    """
+    构建传给SDK底层httpx客户端的参数 / Build the kwargs forwarded to the SDK's underlying httpx client
+
+    Args:
+        timeout: 请求超时时间(秒)
+
+    Returns:
+        Dict: timeout/limits/http2 参数
+    """
+    return {
+        "timeout": httpx.Timeout(timeout, connect=min(10.0, float(timeout))),
+        "limits": _HTTP_LIMITS,
+        "http2": _HTTP2_AVAILABLE,
+    }
+
+# 并发请求上限，与服务端 OLLAMA_NUM_PARALLEL 保持一致 / Concurrent request cap, keep in line with the server's OLLAMA_NUM_PARALLEL
+try:
+    NUM_PARALLEL = max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")))
+except ValueError:
+    NUM_PARALLEL = 4
+
+# 模型在显存中的保留时长，避免对话轮次间重新加载 / How long the model stays loaded, avoiding reloads between turns
+DEFAULT_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# 异步客户端绑定事件循环，循环结束后自动释放 / Async clients are bound to their event loop and dropped with it
+_ASYNC_CLIENT_POOL: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], AsyncClient]]' = weakref.WeakKeyDictionary()
+
+# 已编码图片的LRU缓存，多轮对话复用同一图片 / LRU cache of encoded images, reused across conversation turns
+_ENCODED_IMAGE_CACHE: 'OrderedDict[tuple, Tuple[Optional[weakref.ref], Union[str, bytes]]]' = OrderedDict()
+_ENCODED_IMAGE_LOCK = threading.Lock()
+ENCODED_IMAGE_CACHE_SIZE = 16
+
+# 模型不支持单条消息多图时的服务端错误 / Server errors for models that reject several images in one message
+_MULTI_IMAGE_ERROR_RE = re.compile(r'multi(?:ple)?[- ]images?|more than one image|only supports? (?:one|a single) image', re.IGNORECASE)
+
+# 图片编码线程池，首次使用时创建并在进程内复用 / Image-encoding thread pool, created on first use and reused process-wide
+_ENCODE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ENCODE_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_encode_executor() -> ThreadPoolExecutor:
+    """获取共享的图片编码线程池 / Get the shared image-encoding thread pool"""
+    global _ENCODE_EXECUTOR
+    if _ENCODE_EXECUTOR is None:
+        with _ENCODE_EXECUTOR_LOCK:
+            if _ENCODE_EXECUTOR is None:
+                _ENCODE_EXECUTOR = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                                                      thread_name_prefix="siberia-encode")
+    return _ENCODE_EXECUTOR
+
+
+class _InflightRequest:
+    """
+    进行中的视觉请求：结果Future，以及转发流式片段给所有等待者的回调
+    An in-flight vision request: the result Future plus the callbacks streamed pieces are fanned out to
+    """
+
+    __slots__ = ('future', 'callbacks', 'parts', 'lock')
+
+    def __init__(self):
+        self.future = Future()
+        self.callbacks: List[Callable[[str], None]] = []
+        self.parts: List[str] = []
+        self.lock = threading.Lock()
+
+    def join(self, on_token: Optional[Callable[[str], None]]) -> None:
+        """加入等待，先补发已产生的文本 / Join as a waiter, replaying the text produced so far first"""
+        if on_token is None:
+            return
+        with self.lock:
+            if self.parts:
+                on_token(''.join(self.parts))
+            self.callbacks.append(on_token)
+
+    def emit(self, piece: str) -> None:
+        """把片段转发给所有回调 / Fan a piece out to every callback"""
+        with self.lock:
+            self.parts.append(piece)
+            for callback in self.callbacks:
+                try:
+                    callback(piece)
+                except Exception as e:
+                    print(f"Warning: Streaming callback failed: {e}")
+
+
+# 进行中的视觉请求，相同请求等待同一结果 / In-flight vision requests, identical requests wait on the same result
+_INFLIGHT_REQUESTS: Dict[bytes, _InflightRequest] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# temperature为0时结果确定，缓存最近的结果 / Results are deterministic at temperature 0, cache the most recent ones
+_RESULT_CACHE: 'OrderedDict[bytes, Tuple[str, str]]' = OrderedDict()
+RESULT_CACHE_SIZE = 32
+
+# 服务器URL格式校验 / Server URL format check
+_URL_RE = re.compile(r'^https?://[a-zA-Z0-9.-]+(?::\d{1,5})?$')
+
+# URL协议前缀长度 / URL scheme prefix lengths
+_SCHEME_PREFIX_LEN = {'http://': 7, 'https://': 8}
+
+# base64首尾快速检查 / Quick base64 head and tail checks
+_B64_HEAD_RE = re.compile(r'[A-Za-z0-9+/]{16,64}')
+_B64_TAIL_RE = re.compile(r'[A-Za-z0-9+/]{2}(?:[A-Za-z0-9+/]{2}|[A-Za-z0-9+/]=|==)')
+
+
+def _has_image_magic(head: bytes) -> bool:
+    """
+    根据文件头判断是否为常见图片格式 / Check the leading bytes for a common image signature
+
+    Args:
+        head: 至少12字节的文件头
+
+    Returns:
+        bool: 是否为PNG/JPEG/GIF/WebP/BMP
+    """
+    return (head.startswith((b'\x89PNG', b'\xff\xd8\xff', b'GIF87a', b'GIF89a', b'BM'))
+            or (head[:4] == b'RIFF' and head[8:12] == b'WEBP'))
+
+
+async def _aclose_loop_clients() -> None:
+    """关闭当前事件循环创建的异步客户端 / Close the async clients created on the running loop"""
+    with _POOL_LOCK:
+        clients = _ASYNC_CLIENT_POOL.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        http_client = getattr(client, '_client', None)
+        if http_client is not None:
+            await http_client.aclose()
+
+
+def _run_sync(coro):
+    """
+    在同步代码中运行协程，兼容已有事件循环的线程 / Run a coroutine from sync code, safe in threads with a running loop
+
+    Args:
+        coro: 要运行的协程
+
+    Returns:
+        协程的返回值
+    """
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await _aclose_loop_clients()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(runner())
+
+    # 当前线程已有事件循环(如ComfyUI服务器)，在独立线程中运行 / A loop is already running here, run in a separate thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, runner()).result()
+
 
 class SiberiaOllamaSDKClient:
     """
@@ -45,8 +249,25 @@ class SiberiaOllamaSDKClient:
         'llama3.2-vision:11b', 'llama3.2-vision:90b'
     ]
 
+    # 预计算的查找结构 / Precomputed lookup structures
+    _VISION_EXACT_LC = frozenset(m.lower() for m in VISION_MODELS_EXACT)
+    _VISION_KW_RE = re.compile('|'.join(map(re.escape, VISION_MODEL_KEYWORDS)))
+
+    # 按原始模型名缓存的判断结果，模型名数量很少 / Results memoized per raw model name, of which there are few
+    _VISION_LOOKUP_CACHE: Dict[str, bool] = {}
+
+    # base64上传支持的图片编码格式 / Image encodings supported for base64 upload
+    IMAGE_FORMATS = ('jpeg', 'png', 'webp')
+
+    # 上传前的最大边长，按模型关键词匹配 / Max image side before upload, matched by model keyword
+    DEFAULT_MAX_IMAGE_SIDE = 1568
+    _MODEL_MAX_IMAGE_SIDE = (('llava', 672), ('qwen', 1568))
+
     def __init__(self, server_url: str = "http://127.0.0.1:11434", model: str = "llama2", timeout: int = 30,
-                 use_base64: bool = True):
+                 use_base64: bool = True, image_format: str = "jpeg", max_image_side: Optional[int] = None,
+                 use_gpu_preprocess: bool = True, assume_01: bool = True,
+                 keep_alive: Optional[Union[str, float]] = None, fast_encode: bool = True,
+                 num_ctx: Optional[int] = None, num_batch: Optional[int] = None):
         """
         初始化客户端 / Initialize client
 
@@ -54,12 +275,33 @@ class SiberiaOllamaSDKClient:
             server_url: Ollama服务器URL
             model: 默认模型名称
             timeout: 请求超时时间(秒)
-            use_base64: 是否使用base64格式传输图片
+            use_base64: 是否使用base64格式传输图片，否则传入内存中的图片字节
+            image_format: 图片编码格式 ('jpeg'|'png'|'webp')，需要无损时使用'png'
+            max_image_side: 上传前缩放的最大边长，None按模型选择，0表示不缩放
+            use_gpu_preprocess: 张量在GPU上时先在GPU上转换为uint8
+            assume_01: 浮点张量按 [0, 1] 处理，False时通过max()检测 [0, 255] 数据
+            keep_alive: 模型保留时长，如 '30m' 或秒数，None时使用 OLLAMA_KEEP_ALIVE 环境变量(默认'30m')
+            fast_encode: PNG使用最快的压缩级别，远程低带宽服务器可关闭以减小体积
+            num_ctx: 上下文长度，None使用服务端默认值(2048)
+            num_batch: 提示词处理批大小，None使用服务端默认值(512)；显存紧张时用128，可腾出显存开启 OLLAMA_NUM_PARALLEL>1
         """
         self.server_url = self._normalize_server_url(server_url)
         self.model = model
         self.timeout = max(5, min(300, int(timeout)))  # 限制在5-300秒之间
         self.use_base64 = use_base64
+        self.image_format = str(image_format).lower() if image_format else "jpeg"
+        if self.image_format not in self.IMAGE_FORMATS:
+            print(f"Warning: Unsupported image format '{image_format}', using jpeg")
+            self.image_format = "jpeg"
+        if max_image_side is None:
+            max_image_side = self._default_max_image_side(model)
+        self.max_image_side = max(0, int(max_image_side))
+        self.use_gpu_preprocess = bool(use_gpu_preprocess)
+        self.assume_01 = bool(assume_01)
+        self.keep_alive = DEFAULT_KEEP_ALIVE if keep_alive is None else keep_alive
+        self.fast_encode = bool(fast_encode)
+        self.num_ctx = max(0, int(num_ctx)) if num_ctx else None
+        self.num_batch = max(0, int(num_batch)) if num_batch else None
 
         # 连接状态
         self._connected = False
@@ -68,7 +310,20 @@ class SiberiaOllamaSDKClient:
         # 创建Ollama SDK客户端实例，延迟初始化
         self._client = None
 
-    def _normalize_server_url(self, url: str) -> str:
+        # 最近一次generate返回的context，可传回以续写 / Context ids from the last generate call, pass back to continue
+        self.last_context: Optional[List[int]] = None
+
+    @classmethod
+    def _default_max_image_side(cls, model: str) -> int:
+        """按模型名称选择默认最大边长 / Pick the default max image side from the model name"""
+        model_lc = (model or "").lower()
+        for keyword, side in cls._MODEL_MAX_IMAGE_SIDE:
+            if keyword in model_lc:
+                return side
+        return cls.DEFAULT_MAX_IMAGE_SIDE
+
+    @staticmethod
+    def _normalize_server_url(url: str) -> str:
         """标准化服务器URL / Normalize server URL"""
         if not url or not isinstance(url, str):
             return "http://127.0.0.1:11434"
@@ -81,29 +336,46 @@ class SiberiaOllamaSDKClient:
             url = f'http://{url}'
 
         # 基本URL格式验证
-        pattern = r'^https?://[a-zA-Z0-9.-]+(?::\d{1,5})?$'
-        if not re.match(pattern, url):
+        if not _URL_RE.match(url):
             print(f"Warning: Invalid URL format '{url}', using default")
             return "http://127.0.0.1:11434"
 
         return url
 
     def _get_client(self) -> Client:
-        """获取Ollama SDK客户端实例 / Get Ollama SDK client instance"""
+        """获取Ollama SDK客户端实例，按 (主机, 超时) 共享 / Get Ollama SDK client instance, shared per (host, timeout)"""
         if self._client is None:
             # Ollama SDK 需要主机部分，不包含协议
             host = self._extract_host_from_url(self.server_url)
-            self._client = Client(host=host, timeout=self.timeout)
+            key = (host, self.timeout)
+            with _POOL_LOCK:
+                client = _CLIENT_POOL.get(key)
+                if client is None:
+                    client = Client(host=host, **_http_options(self.timeout))
+                    _CLIENT_POOL[key] = client
+            self._client = client
         return self._client
 
+    def _get_async_client(self) -> AsyncClient:
+        """获取当前事件循环的异步SDK客户端，按 (主机, 超时) 共享 / Get the async SDK client for the running loop, shared per (host, timeout)"""
+        loop = asyncio.get_running_loop()
+        key = (self._extract_host_from_url(self.server_url), self.timeout)
+        with _POOL_LOCK:
+            clients = _ASYNC_CLIENT_POOL.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = AsyncClient(host=key[0], **_http_options(self.timeout))
+                clients[key] = client
+        return client
+
+    def close(self) -> None:
+        """释放对共享客户端的引用，连接由池统一关闭 / Release the shared client; the pool closes connections on exit"""
+        self._client = None
+
     def _extract_host_from_url(self, url: str) -> str:
         """从URL提取主机部分 / Extract host part from URL"""
-        if url.startswith('http://'):
-            return url[7:]
-        elif url.startswith('https://'):
-            return url[8:]
-        else:
-            return url
+        scheme_end = url.find('://') + 3
+        return url[_SCHEME_PREFIX_LEN.get(url[:scheme_end], 0):] if scheme_end > 2 else url
 
     def is_vision_model(self, model_name: str = None) -> bool:
         """
@@ -118,17 +390,7 @@ class SiberiaOllamaSDKClient:
         if model_name is None:
             model_name = self.model
 
-        if not model_name:
-            return False
-
-        model_name_lower = model_name.lower()
-
-        # 检查精确匹配
-        if model_name_lower in [m.lower() for m in self.VISION_MODELS_EXACT]:
-            return True
-
-        # 检查关键词匹配
-        return any(keyword in model_name_lower for keyword in self.VISION_MODEL_KEYWORDS)
+        return self.is_vision_model_static(model_name)
 
     @classmethod
     def is_vision_model_static(cls, model_name: str) -> bool:
@@ -144,22 +406,41 @@ class SiberiaOllamaSDKClient:
         if not model_name:
             return False
 
-        model_name_lower = model_name.lower()
+        cached = cls._VISION_LOOKUP_CACHE.get(model_name)
+        if cached is not None:
+            return cached
 
-        # 检查精确匹配
-        if model_name_lower in [m.lower() for m in cls.VISION_MODELS_EXACT]:
-            return True
+        model_name_lower = model_name.lower()
 
-        # 检查关键词匹配
-        return any(keyword in model_name_lower for keyword in cls.VISION_MODEL_KEYWORDS)
+        # 精确匹配或单次正则扫描所有关键词 / Exact match, or one regex scan over all keywords
+        result = model_name_lower in cls._VISION_EXACT_LC or cls._VISION_KW_RE.search(model_name_lower) is not None
+        cls._VISION_LOOKUP_CACHE[model_name] = result
+        return result
 
-    def test_connection(self) -> bool:
+    def test_connection(self, force: bool = False) -> bool:
         """
         测试连接并获取可用模型列表 / Test connection and get available models
 
+        Args:
+            force: 忽略近期成功的探测结果，强制请求服务器
+
         Returns:
             bool: 连接是否成功
         """
+        # 近期已验证过的服务器直接复用结果 / Reuse a recent successful probe of this server
+        if not force:
+            entry = _MODELS_CACHE.get(self.server_url)
+            if entry is not None and entry[2] and time.monotonic() - entry[0] < CONNECTION_CACHE_TTL:
+                self._available_models = list(entry[1])
+                self._connected = True
+                return True
+
+            # 服务器近期探测失败时按指数退避，不重复请求 / Back off exponentially instead of re-probing a server that just failed
+            backoff = _PROBE_BACKOFF.get(self.server_url)
+            if backoff is not None and time.monotonic() - backoff[0] < backoff[1]:
+                self._connected = False
+                return False
+
         try:
             print(f"Testing connection to: {self.server_url}")
 
@@ -175,8 +456,8 @@ class SiberiaOllamaSDKClient:
             elif hasattr(models_response, 'models'):
                 models = models_response.models
 
-            # 提取模型名称
-            self._available_models = []
+            # 提取模型名称，完成后整体替换 / Extract model names, then swap the list in whole
+            names = []
             for model in models:
                 if isinstance(model, dict):
                     name = model.get('name', '') or model.get('model', '')
@@ -188,9 +469,13 @@ class SiberiaOllamaSDKClient:
                     continue
 
                 if name:  # 确保名称不为空
-                    self._available_models.append(name)
+                    names.append(name)
 
+            self._available_models = names
             self._connected = True
+            _PROBE_BACKOFF.pop(self.server_url, None)
+            _MODELS_CACHE[self.server_url] = (time.monotonic(), list(self._available_models), True)
+            _LAST_GOOD_MODELS[self.server_url] = list(self._available_models)
             print(f"Connection successful. Found {len(self._available_models)} models")
 
             if self._available_models:
@@ -203,15 +488,91 @@ class SiberiaOllamaSDKClient:
             error_msg = f"Ollama API error: {e}"
             print(error_msg)
         except Exception as e:
+            self._evict_on_transport_error(e)
             error_msg = f"Connection error: {type(e).__name__}: {e}"
             print(error_msg)
 
         self._connected = False
         self._available_models = []
+        now = time.monotonic()
+        _MODELS_CACHE[self.server_url] = (now, [], False)
+        previous = _PROBE_BACKOFF.get(self.server_url)
+        delay = min(PROBE_BACKOFF_MAX, previous[1] * 2) if previous else PROBE_BACKOFF_INITIAL
+        _PROBE_BACKOFF[self.server_url] = (now, delay)
         return False
 
+    def _invalidate_connection(self) -> None:
+        """API出错后丢弃缓存的连接状态，下次调用重新探测 / Drop cached connection state after an API error so the next call re-probes"""
+        self._connected = False
+        _MODELS_CACHE.pop(self.server_url, None)
+
+    def _evict_on_transport_error(self, error: BaseException) -> None:
+        """
+        连接层出错时从池中移除共享客户端 / Evict the pooled clients after a transport-level error
+
+        Args:
+            error: 捕获到的异常
+        """
+        if not isinstance(error, _TRANSPORT_ERRORS):
+            return
+        self._invalidate_connection()
+        key = (self._extract_host_from_url(self.server_url), self.timeout)
+        with _POOL_LOCK:
+            # 只移除仍是本实例所用的客户端，避免误删已重建的 / Only evict the client this instance used, not a rebuilt one
+            if self._client is not None and _CLIENT_POOL.get(key) is self._client:
+                del _CLIENT_POOL[key]
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                _ASYNC_CLIENT_POOL.get(loop, {}).pop(key, None)
+        self._client = None
+
+    def _build_options(self, temperature: float, max_tokens: int, max_temperature: float = 2.0) -> Dict:
+        """
+        限制参数范围并构建SDK选项 / Clamp parameters and build the SDK options dict
+
+        Args:
+            temperature: 生成温度
+            max_tokens: 最大生成token数
+            max_temperature: 温度上限
+
+        Returns:
+            Dict: {'temperature', 'num_predict'}，设置时包含 'num_ctx'/'num_batch'
+        """
+        options = {
+            "temperature": max(0.0, min(max_temperature, float(temperature))),
+            "num_predict": max(1, min(8192, int(max_tokens)))
+        }
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        if self.num_batch:
+            options["num_batch"] = self.num_batch
+        return options
+
+    def _sanitize(self, prompt: str, system_prompt: str, temperature: float, max_tokens: int,
+                  max_temperature: float = 2.0) -> Tuple[str, str, Dict]:
+        """
+        一次性清理提示词并构建选项 / Strip prompts and build options in one pass
+
+        Args:
+            prompt: 用户提示词
+            system_prompt: 系统提示词
+            temperature: 生成温度
+            max_tokens: 最大生成token数
+            max_temperature: 温度上限
+
+        Returns:
+            Tuple[str, str, Dict]: (提示词, 系统提示词, SDK选项)
+        """
+        return ((prompt or "").strip(), (system_prompt or "").strip(),
+                self._build_options(temperature, max_tokens, max_temperature))
+
     def generate_text(self, prompt: str, system_prompt: str = "You are a helpful assistant.",
-                     temperature: float = 0.7, max_tokens: int = 500) -> Tuple[str, str]:
+                     temperature: float = 0.7, max_tokens: int = 500,
+                     on_token: Optional[Callable[[str], None]] = None,
+                     context: Optional[List[int]] = None) -> Tuple[str, str]:
         """
         生成文本 / Generate text
 
@@ -220,19 +581,18 @@ class SiberiaOllamaSDKClient:
             system_prompt: 系统提示词
             temperature: 生成温度 (0.0-2.0)
             max_tokens: 最大生成token数
+            on_token: 流式文本片段回调
+            context: 上一次调用的 last_context，续写时服务端跳过已处理的token
 
         Returns:
             Tuple[str, str]: (生成的文本, 状态信息)
         """
         try:
-            # 验证输入
-            if not prompt or not prompt.strip():
+            # 验证输入并限制参数范围
+            prompt, system_prompt, options = self._sanitize(prompt, system_prompt, temperature, max_tokens)
+            if not prompt:
                 return "", "Error: Empty prompt"
 
-            # 限制参数范围
-            temperature = max(0.0, min(2.0, float(temperature)))
-            max_tokens = max(1, min(8192, int(max_tokens)))
-
             # 检查连接
             if not self._connected:
                 if not self.test_connection():
@@ -244,23 +604,18 @@ class SiberiaOllamaSDKClient:
             client = self._get_client()
             print(f"Generating text with model: {self.model}")
 
-            # 使用Ollama SDK生成文本
-            response = client.generate(
+            # 使用Ollama SDK流式生成文本
+            stream = client.generate(
                 model=self.model,
-                prompt=prompt.strip(),
-                system=system_prompt.strip(),
-                options={
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
+                prompt=prompt,
+                system=system_prompt,
+                options=options,
+                context=context,
+                stream=True,
+                keep_alive=self.keep_alive
             )
-
-            # 处理响应
-            generated_text = ""
-            if isinstance(response, dict):
-                generated_text = response.get('response', '')
-            elif hasattr(response, 'response'):
-                generated_text = response.response
+            generated_text, last_chunk = self._accumulate_streaming_response(stream, 'generate', on_token)
+            self.last_context = self._extract_context(last_chunk)
 
             if generated_text:
                 status_msg = f"Successfully generated {len(generated_text)} characters"
@@ -269,13 +624,16 @@ class SiberiaOllamaSDKClient:
                 return "", "Error: Empty response from model"
 
         except (ResponseError, RequestError) as e:
+            self._invalidate_connection()
             error_msg = f"Ollama API error: {e}"
             return "", error_msg
         except Exception as e:
+            self._evict_on_transport_error(e)
             error_msg = f"Generation error: {type(e).__name__}: {e}"
             return "", error_msg
 
-    def chat(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 4096) -> Tuple[str, str, List[Dict]]:
+    def chat(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 4096,
+             on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, str, List[Dict]]:
         """
         聊天对话 / Chat conversation
 
@@ -283,56 +641,27 @@ class SiberiaOllamaSDKClient:
             messages: 消息历史列表
             temperature: 生成温度 (0.0-2.0)
             max_tokens: 最大生成token数
+            on_token: 流式文本片段回调
 
         Returns:
             Tuple[str, str, List[Dict]]: (回复文本, 状态信息, 更新后的消息列表)
         """
-        try:
-            # 验证输入
-            if not messages or not isinstance(messages, list):
-                return "", "Error: Invalid or empty messages", []
-
-            # 验证消息格式
-            valid_roles = {'system', 'user', 'assistant'}
-            for msg in messages:
-                if not isinstance(msg, dict) or 'role' not in msg or 'content' not in msg:
-                    return "", "Error: Invalid message format", messages
-                if msg['role'] not in valid_roles:
-                    return "", f"Error: Invalid role '{msg['role']}'", messages
-
-            # 限制参数范围
-            temperature = max(0.0, min(2.0, float(temperature)))
-            max_tokens = max(1, min(8192, int(max_tokens)))
-
-            # 检查连接
-            if not self._connected:
-                if not self.test_connection():
-                    return "", "Error: Failed to connect to Ollama server", messages
+        # 验证输入
+        if not messages or not isinstance(messages, list):
+            return "", "Error: Invalid or empty messages", []
 
-            if not self._available_models:
-                return "", "Error: No models available on server", messages
-
-            client = self._get_client()
-            print(f"Chat request with {len(messages)} messages using model: {self.model}")
-
-            # 使用Ollama SDK进行聊天
-            response = client.chat(
-                model=self.model,
-                messages=messages,
-                options={
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
-            )
-
-            # 处理响应
-            response_text = ""
-            if isinstance(response, dict):
-                message = response.get('message', {})
-                if isinstance(message, dict):
-                    response_text = message.get('content', '')
-            elif hasattr(response, 'message') and hasattr(response.message, 'content'):
-                response_text = response.message.content
+        try:
+            options, error = self._prepare_chat(messages, temperature, max_tokens)
+            if error:
+                return "", error, messages
+
+            # 使用流式聊天累积回复 / Accumulate the reply from the streaming chat
+            parts = []
+            for piece in self._stream_chat(messages, options):
+                parts.append(piece)
+                if on_token is not None:
+                    on_token(piece)
+            response_text = ''.join(parts)
 
             if response_text:
                 # 更新消息历史
@@ -343,14 +672,115 @@ class SiberiaOllamaSDKClient:
                 return "", "Error: Empty response from model", messages
 
         except (ResponseError, RequestError) as e:
+            # 连接状态已在 _stream_chat 中处理 / Connection state was already handled in _stream_chat
             error_msg = f"Ollama API error: {e}"
             return "", error_msg, messages
         except Exception as e:
             error_msg = f"Chat error: {type(e).__name__}: {e}"
             return "", error_msg, messages
 
+    def chat_stream(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 4096) -> Iterator[str]:
+        """
+        流式聊天，逐段产出回复文本 / Streaming chat yielding reply text as it arrives
+
+        Args:
+            messages: 消息历史列表
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+
+        Returns:
+            Iterator[str]: 回复文本片段；参数、连接或API错误时抛出异常
+        """
+        if not messages or not isinstance(messages, list):
+            raise ValueError("Error: Invalid or empty messages")
+
+        options, error = self._prepare_chat(messages, temperature, max_tokens)
+        if error:
+            raise ValueError(error)
+
+        yield from self._stream_chat(messages, options)
+
+    def _prepare_chat(self, messages: List[Dict], temperature: float,
+                      max_tokens: int) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        校验消息与连接并构建选项 / Validate messages and connection and build the options
+
+        Args:
+            messages: 消息历史列表
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+
+        Returns:
+            Tuple[Optional[Dict], Optional[str]]: (生成选项, 错误信息)，校验通过时错误信息为None
+        """
+        # 验证消息格式
+        error = self._validate_messages(messages)
+        if error:
+            return None, error
+
+        # 检查连接
+        if not self._connected and not self.test_connection():
+            return None, "Error: Failed to connect to Ollama server"
+
+        if not self._available_models:
+            return None, "Error: No models available on server"
+
+        # 限制参数范围
+        return self._build_options(temperature, max_tokens), None
+
+    def _stream_chat(self, messages: List[Dict], options: Dict) -> Iterator[str]:
+        """
+        发起流式聊天请求并产出文本片段 / Issue a streaming chat request and yield text pieces
+
+        Args:
+            messages: 已校验的消息列表
+            options: 生成选项
+
+        Returns:
+            Iterator[str]: 回复文本片段；API错误时使连接失效并重新抛出
+        """
+        print(f"Chat request with {len(messages)} messages using model: {self.model}")
+        try:
+            stream = self._get_client().chat(
+                model=self.model,
+                messages=messages,
+                options=options,
+                stream=True,
+                keep_alive=self.keep_alive
+            )
+            for chunk in stream:
+                piece = self._extract_response_text(chunk, 'chat')
+                if piece:
+                    yield piece
+        except (ResponseError, RequestError):
+            self._invalidate_connection()
+            raise
+        except Exception as e:
+            self._evict_on_transport_error(e)
+            raise
+
+    _VALID_ROLES = frozenset(('system', 'user', 'assistant'))
+
+    def _validate_messages(self, messages: List[Dict]) -> Optional[str]:
+        """
+        验证消息格式 / Validate message format
+
+        Args:
+            messages: 消息历史列表
+
+        Returns:
+            Optional[str]: 错误信息，格式正确时返回None
+        """
+        for msg in messages:
+            if not isinstance(msg, dict) or 'role' not in msg or 'content' not in msg:
+                return "Error: Invalid message format"
+            if msg['role'] not in self._VALID_ROLES:
+                return f"Error: Invalid role '{msg['role']}'"
+        return None
+
     def analyze_image(self, prompt: str, image_data, system_prompt: str = "You are a helpful assistant.",
-                     temperature: float = 0.7, max_tokens: int = 500) -> Tuple[str, str]:
+                     temperature: float = 0.7, max_tokens: int = 500,
+                     on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, str]:
         """
         分析图片 / Analyze image
 
@@ -360,13 +790,15 @@ class SiberiaOllamaSDKClient:
             system_prompt: 系统提示词
             temperature: 生成温度 (0.0-2.0)
             max_tokens: 最大生成token数
+            on_token: 流式文本片段回调
 
         Returns:
             Tuple[str, str]: (分析结果, 状态信息)
         """
         try:
-            # 验证输入
-            if not prompt or not prompt.strip():
+            # 验证输入并限制参数范围
+            prompt, system_prompt, options = self._sanitize(prompt, system_prompt, temperature, max_tokens)
+            if not prompt:
                 return "", "Error: Empty prompt"
 
             if image_data is None:
@@ -376,10 +808,6 @@ class SiberiaOllamaSDKClient:
             if not self.is_vision_model():
                 return "", f"Error: Model '{self.model}' does not support vision. Please use a vision model."
 
-            # 限制参数范围
-            temperature = max(0.0, min(2.0, float(temperature)))
-            max_tokens = max(1, min(8192, int(max_tokens)))
-
             # 检查连接
             if not self._connected:
                 if not self.test_connection():
@@ -393,77 +821,22 @@ class SiberiaOllamaSDKClient:
             if not image_data_processed:
                 return "", "Error: Failed to prepare image for analysis"
 
-            try:
-                client = self._get_client()
-                print(f"Analyzing image with model: {self.model} (format: {'base64' if self.use_base64 else 'file path'})")
-
-                # 准备消息
-                if self.use_base64:
-                    # 使用base64数据
-                    messages = [
-                        {
-                            'role': 'system',
-                            'content': system_prompt.strip()
-                        },
-                        {
-                            'role': 'user',
-                            'content': prompt.strip(),
-                            'images': [image_data_processed]
-                        }
-                    ]
-                else:
-                    # 使用文件路径
-                    messages = [
-                        {
-                            'role': 'system',
-                            'content': system_prompt.strip()
-                        },
-                        {
-                            'role': 'user',
-                            'content': prompt.strip(),
-                            'images': [image_data_processed]
-                        }
-                    ]
-
-                # 使用Ollama SDK分析图片
-                response = client.chat(
-                    model=self.model,
-                    messages=messages,
-                    options={
-                        'temperature': temperature,
-                        'num_predict': max_tokens
-                    }
-                )
-
-                # 处理响应
-                response_text = ""
-                if isinstance(response, dict):
-                    message = response.get('message', {})
-                    if isinstance(message, dict):
-                        response_text = message.get('content', '')
-                elif hasattr(response, 'message') and hasattr(response.message, 'content'):
-                    response_text = response.message.content
-
-                if response_text:
-                    status_msg = f"Successfully analyzed image"
-                    return response_text, status_msg
-                else:
-                    return "", "Error: Empty response from vision model"
-
-            finally:
-                # 清理临时文件（仅在非base64模式下）
-                if not self.use_base64:
-                    self._cleanup_temp_file(image_data_processed)
+            print(f"Analyzing image with model: {self.model} (format: {'base64' if self.use_base64 else 'bytes'})")
+            return self._vision_chat(prompt, system_prompt, [image_data_processed], options, on_token,
+                                     "Successfully analyzed image")
 
         except (ResponseError, RequestError) as e:
+            self._invalidate_connection()
             error_msg = f"Ollama API error: {e}"
             return "", f"Image analysis failed: {error_msg}"
         except Exception as e:
+            self._evict_on_transport_error(e)
             error_msg = f"Image analysis error: {type(e).__name__}: {e}"
             return "", error_msg
 
     def analyze_multiple_images(self, prompt: str, images_data: List, system_prompt: str = "You are a helpful assistant.",
-                                temperature: float = 0.7, max_tokens: int = 500) -> Tuple[str, str]:
+                                temperature: float = 0.7, max_tokens: int = 500,
+                                on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, str]:
         """
         分析多张图片 / Analyze multiple images in a single request
 
@@ -473,13 +846,17 @@ class SiberiaOllamaSDKClient:
             system_prompt: 系统提示词
             temperature: 生成温度 (0.0-2.0)
             max_tokens: 最大生成token数
+            on_token: 流式文本片段回调
 
         Returns:
             Tuple[str, str]: (分析结果, 状态信息)
         """
+        image_data_list = []
         try:
-            # 验证输入
-            if not prompt or not prompt.strip():
+            # 验证输入并限制参数范围 (多图片时使用更保守的温度上限)
+            prompt, system_prompt, options = self._sanitize(prompt, system_prompt, temperature, max_tokens,
+                                                            max_temperature=1.0)
+            if not prompt:
                 return "", "Error: Empty prompt"
 
             if not images_data or len(images_data) == 0:
@@ -489,10 +866,6 @@ class SiberiaOllamaSDKClient:
             if not self.is_vision_model():
                 return "", f"Error: Model '{self.model}' does not support vision. Please use a vision model."
 
-            # 限制参数范围 (多图片时使用更保守的参数)
-            temperature = max(0.0, min(1.0, float(temperature)))
-            max_tokens = max(1, min(8192, int(max_tokens)))
-
             # 限制图片数量以避免内存问题
             if len(images_data) > 10:
                 return "", "Error: Too many images provided (maximum 10 allowed per request)"
@@ -506,86 +879,571 @@ class SiberiaOllamaSDKClient:
                 return "", "Error: No models available on server"
 
             # 准备所有图片数据
-            image_data_list = []
-            temp_files = []
-
+            # 相同图片只编码一次 / Encode identical images only once
+            order = []
+            unique = {}
             for i, image_data in enumerate(images_data):
                 if image_data is None:
                     continue
+                key = self._image_cache_key(image_data)[0] or ('index', i)
+                unique.setdefault(key, image_data)
+                order.append(key)
+
+            pending = list(unique.items())
+            if len(pending) > 1:
+                # 编码主要在 PIL/zlib 中释放 GIL，多线程并行处理 / Encoding releases the GIL, prepare images concurrently
+                executor = _get_encode_executor()
+                prepared = dict(zip(unique, executor.map(self._prepare_image_for_sdk, unique.values())))
+            else:
+                prepared = {key: self._prepare_image_for_sdk(image_data) for key, image_data in pending}
 
-                image_data_processed = self._prepare_image_for_sdk(image_data)
+            for key in order:
+                image_data_processed = prepared[key]
                 if image_data_processed:
                     image_data_list.append(image_data_processed)
-                    # 如果不是base64模式且是临时文件，记录下来以便清理
-                    if not self.use_base64 and isinstance(image_data_processed, str) and os.path.exists(image_data_processed):
-                        temp_files.append(image_data_processed)
 
             if not image_data_list:
                 return "", "Error: Failed to prepare any images for analysis"
 
+            # 所有图片放在同一条用户消息中；模型不支持多图时退回逐张并发分析，结果同样共享给等待者
+            # All images go into a single user message; if the model rejects that, fall back to per-image analysis, shared with waiters too
+            fallback = None
+            if len(image_data_list) > 1:
+                fallback = functools.partial(self._analyze_images_individually, prompt, image_data_list,
+                                             system_prompt, options)
+            return self._vision_chat(prompt, system_prompt, image_data_list, options, on_token,
+                                     f"Successfully analyzed {len(image_data_list)} images",
+                                     multi_image_fallback=fallback)
+
+        except (ResponseError, RequestError) as e:
+            self._invalidate_connection()
+            error_msg = f"Ollama API error: {e}"
+            return "", f"Multi-image analysis failed: {error_msg}"
+        except Exception as e:
+            self._evict_on_transport_error(e)
+            error_msg = f"Multi-image analysis error: {type(e).__name__}: {e}"
+            return "", error_msg
+
+    def _request_key(self, prompt: str, system_prompt: str, options: Dict, payloads: List) -> bytes:
+        """
+        计算视觉请求的指纹 / Fingerprint a vision request
+
+        Args:
+            prompt: 提示词
+            system_prompt: 系统提示词
+            options: SDK选项
+            payloads: 已编码的图片负载
+
+        Returns:
+            bytes: 16字节摘要
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.server_url, self.model, prompt, system_prompt, repr(sorted(options.items()))):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        for payload in payloads:
+            digest.update(payload if isinstance(payload, bytes) else payload.encode('ascii'))
+            digest.update(b'\0')
+        return digest.digest()
+
+    def _vision_chat(self, prompt: str, system_prompt: str, payloads: List, options: Dict,
+                     on_token: Optional[Callable[[str], None]], success_msg: str,
+                     multi_image_fallback: Optional[Callable[[], Tuple[str, str]]] = None) -> Tuple[str, str]:
+        """
+        发送带图片的聊天请求，合并相同的进行中请求 / Send a chat request with images, coalescing identical in-flight requests
+
+        Args:
+            prompt: 提示词
+            system_prompt: 系统提示词
+            payloads: 已编码的图片负载，base64字符串和原始字节SDK均可接收
+            options: SDK选项
+            on_token: 流式文本片段回调，合并到同一请求的调用方都会收到
+            success_msg: 成功时的状态信息
+            multi_image_fallback: 模型拒绝多图输入时执行的回退，其结果共享给所有等待者
+
+        Returns:
+            Tuple[str, str]: (分析结果, 状态信息)；API错误以异常形式抛出
+        """
+        key = self._request_key(prompt, system_prompt, options, payloads)
+        deterministic = options.get("temperature") == 0.0
+
+        with _INFLIGHT_LOCK:
+            if deterministic and key in _RESULT_CACHE:
+                _RESULT_CACHE.move_to_end(key)
+                return _RESULT_CACHE[key]
+            entry = _INFLIGHT_REQUESTS.get(key)
+            owner = entry is None
+            if owner:
+                entry = _InflightRequest()
+                _INFLIGHT_REQUESTS[key] = entry
+
+        # 相同请求正在进行，接收其流式片段并等待结果 / An identical request is running, receive its pieces and wait for the result
+        entry.join(on_token)
+        future = entry.future
+        if not owner:
+            return future.result()
+
+        try:
             try:
-                client = self._get_client()
-
-                # 准备消息 - 包含多张图片
-                messages = [
-                    {
-                        'role': 'system',
-                        'content': system_prompt.strip()
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt.strip(),
-                        'images': image_data_list
-                    }
-                ]
-
-                # 使用Ollama SDK分析多张图片
-                response = client.chat(
+                stream = self._get_client().chat(
                     model=self.model,
-                    messages=messages,
-                    options={
-                        'temperature': temperature,
-                        'num_predict': max_tokens
-                    }
+                    messages=[
+                        {'role': 'system', 'content': system_prompt},
+                        {'role': 'user', 'content': prompt, 'images': payloads}
+                    ],
+                    options=options,
+                    stream=True,
+                    keep_alive=self.keep_alive
                 )
+                response_text, _ = self._accumulate_streaming_response(stream, 'chat', entry.emit)
+                result = (response_text, success_msg) if response_text else ("", "Error: Empty response from vision model")
+            except ResponseError as e:
+                if multi_image_fallback is None or not _MULTI_IMAGE_ERROR_RE.search(str(e)):
+                    raise
+                print(f"⚠️ [SiberiaOllamaSDK] {self.model} rejected multi-image input, analyzing images individually")
+                result = multi_image_fallback()
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT_REQUESTS.pop(key, None)
+
+        if deterministic and result[0]:
+            with _INFLIGHT_LOCK:
+                _RESULT_CACHE[key] = result
+                while len(_RESULT_CACHE) > RESULT_CACHE_SIZE:
+                    _RESULT_CACHE.popitem(last=False)
+        return result
+
+    def _analyze_images_individually(self, prompt: str, image_data_list: List, system_prompt: str,
+                                     options: Dict) -> Tuple[str, str]:
+        """
+        逐张并发分析已准备好的图片并合并结果 / Analyze prepared images one by one concurrently and merge the results
 
-                # 处理响应
-                response_text = ""
-                if isinstance(response, dict):
-                    message = response.get('message', {})
-                    if isinstance(message, dict):
-                        response_text = message.get('content', '')
-                elif hasattr(response, 'message') and hasattr(response.message, 'content'):
-                    response_text = response.message.content
-
-                if response_text:
-                    status_msg = f"Successfully analyzed {len(image_data_list)} images"
-                    return response_text, status_msg
-                else:
-                    return "", "Error: Empty response from vision model"
+        Args:
+            prompt: 图片分析提示词
+            image_data_list: 已编码的图片负载列表
+            system_prompt: 系统提示词
+            options: SDK选项
+
+        Returns:
+            Tuple[str, str]: (合并后的分析结果, 状态信息)
+        """
+        results = self.analyze_images_concurrently(prompt, image_data_list, system_prompt,
+                                                   options["temperature"], options["num_predict"])
+        texts = [f"[{i}] {text}" for i, (text, _) in enumerate(results, 1) if text]
+        if not texts:
+            return "", f"Multi-image analysis failed: {results[0][1] if results else 'no results'}"
+        return "\n\n".join(texts), f"Analyzed {len(texts)}/{len(results)} images individually"
+
+    async def _aensure_connected(self) -> bool:
+        """异步检查连接，探测在线程池中执行 / Check the connection asynchronously, probing in the thread pool"""
+        if self._connected:
+            return True
+        return await asyncio.get_running_loop().run_in_executor(None, self.test_connection)
+
+    async def agenerate_text(self, prompt: str, system_prompt: str = "You are a helpful assistant.",
+                             temperature: float = 0.7, max_tokens: int = 500,
+                             on_token: Optional[Callable[[str], None]] = None,
+                             context: Optional[List[int]] = None) -> Tuple[str, str]:
+        """
+        异步生成文本，可通过 asyncio.gather 并发请求 / Generate text asynchronously, can be batched with asyncio.gather
+
+        Args:
+            prompt: 用户提示词
+            system_prompt: 系统提示词
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+            on_token: 流式文本片段回调
+            context: 上一次调用的 last_context
+
+        Returns:
+            Tuple[str, str]: (生成的文本, 状态信息)
+        """
+        try:
+            prompt, system_prompt, options = self._sanitize(prompt, system_prompt, temperature, max_tokens)
+            if not prompt:
+                return "", "Error: Empty prompt"
+
+            if not await self._aensure_connected():
+                return "", "Error: Failed to connect to Ollama server"
+
+            if not self._available_models:
+                return "", "Error: No models available on server"
+
+            stream = await self._get_async_client().generate(
+                model=self.model,
+                prompt=prompt,
+                system=system_prompt,
+                options=options,
+                context=context,
+                stream=True,
+                keep_alive=self.keep_alive
+            )
+            generated_text, last_chunk = await self._aaccumulate_streaming_response(stream, 'generate', on_token)
+            self.last_context = self._extract_context(last_chunk)
 
-            finally:
-                # 清理临时文件（仅在非base64模式下）
-                if not self.use_base64:
-                    for temp_file in temp_files:
-                        self._cleanup_temp_file(temp_file)
+            if generated_text:
+                return generated_text, f"Successfully generated {len(generated_text)} characters"
+            return "", "Error: Empty response from model"
 
         except (ResponseError, RequestError) as e:
-            error_msg = f"Ollama API error: {e}"
-            return "", f"Multi-image analysis failed: {error_msg}"
+            self._invalidate_connection()
+            return "", f"Ollama API error: {e}"
         except Exception as e:
-            error_msg = f"Multi-image analysis error: {type(e).__name__}: {e}"
-            return "", error_msg
+            self._evict_on_transport_error(e)
+            return "", f"Generation error: {type(e).__name__}: {e}"
+
+    async def agenerate_batch(self, prompts: List[str], system_prompt: str = "You are a helpful assistant.",
+                              temperature: float = 0.7, max_tokens: int = 500) -> List[Tuple[str, str]]:
+        """
+        并发生成多个提示词，由Ollama调度器合批 / Generate several prompts concurrently and let Ollama's scheduler batch them
+
+        Args:
+            prompts: 用户提示词列表
+            system_prompt: 系统提示词
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+
+        Returns:
+            List[Tuple[str, str]]: 与prompts顺序一致的 (生成的文本, 状态信息) 列表
+        """
+        if not prompts:
+            return []
+
+        # 只探测一次连接 / Probe the connection once for the whole batch
+        if not await self._aensure_connected():
+            return [("", "Error: Failed to connect to Ollama server")] * len(prompts)
+
+        return list(await asyncio.gather(*[
+            self.agenerate_text(prompt, system_prompt, temperature, max_tokens) for prompt in prompts
+        ]))
+
+    def generate_text_batch(self, prompts: List[str], system_prompt: str = "You are a helpful assistant.",
+                            temperature: float = 0.7, max_tokens: int = 500) -> List[Tuple[str, str]]:
+        """
+        agenerate_batch 的同步包装 / Sync wrapper around agenerate_batch
+
+        Args:
+            prompts: 用户提示词列表
+            system_prompt: 系统提示词
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+
+        Returns:
+            List[Tuple[str, str]]: 与prompts顺序一致的 (生成的文本, 状态信息) 列表
+        """
+        return _run_sync(self.agenerate_batch(prompts, system_prompt, temperature, max_tokens))
+
+    async def achat(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 4096,
+                    on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, str, List[Dict]]:
+        """
+        异步聊天对话 / Chat conversation asynchronously
+
+        Args:
+            messages: 消息历史列表
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+            on_token: 流式文本片段回调
+
+        Returns:
+            Tuple[str, str, List[Dict]]: (回复文本, 状态信息, 更新后的消息列表)
+        """
+        try:
+            if not messages or not isinstance(messages, list):
+                return "", "Error: Invalid or empty messages", []
+
+            error = self._validate_messages(messages)
+            if error:
+                return "", error, messages
+
+            options = self._build_options(temperature, max_tokens)
+
+            if not await self._aensure_connected():
+                return "", "Error: Failed to connect to Ollama server", messages
+
+            if not self._available_models:
+                return "", "Error: No models available on server", messages
+
+            stream = await self._get_async_client().chat(
+                model=self.model,
+                messages=messages,
+                options=options,
+                stream=True,
+                keep_alive=self.keep_alive
+            )
+            response_text, _ = await self._aaccumulate_streaming_response(stream, 'chat', on_token)
+
+            if response_text:
+                updated_messages = messages + [{"role": "assistant", "content": response_text}]
+                return response_text, f"Chat successful: {len(response_text)} characters generated", updated_messages
+            return "", "Error: Empty response from model", messages
+
+        except (ResponseError, RequestError) as e:
+            self._invalidate_connection()
+            return "", f"Ollama API error: {e}", messages
+        except Exception as e:
+            self._evict_on_transport_error(e)
+            return "", f"Chat error: {type(e).__name__}: {e}", messages
+
+    async def aanalyze_image(self, prompt: str, image_data, system_prompt: str = "You are a helpful assistant.",
+                             temperature: float = 0.7, max_tokens: int = 500,
+                             on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, str]:
+        """
+        异步分析图片，图片编码在线程池中执行 / Analyze an image asynchronously, encoding in the thread pool
+
+        Args:
+            prompt: 图片分析提示词
+            image_data: 图片数据 (torch.Tensor或文件路径)
+            system_prompt: 系统提示词
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+            on_token: 流式文本片段回调
+
+        Returns:
+            Tuple[str, str]: (分析结果, 状态信息)
+        """
+        try:
+            prompt, system_prompt, options = self._sanitize(prompt, system_prompt, temperature, max_tokens)
+            if not prompt:
+                return "", "Error: Empty prompt"
+
+            if image_data is None:
+                return "", "Error: No image data provided"
+
+            if not self.is_vision_model():
+                return "", f"Error: Model '{self.model}' does not support vision. Please use a vision model."
+
+            if not await self._aensure_connected():
+                return "", "Error: Failed to connect to Ollama server"
+
+            if not self._available_models:
+                return "", "Error: No models available on server"
+
+            loop = asyncio.get_running_loop()
+            image_data_processed = await loop.run_in_executor(None, self._prepare_image_for_sdk, image_data)
+            if not image_data_processed:
+                return "", "Error: Failed to prepare image for analysis"
+
+            messages = [
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': prompt, 'images': [image_data_processed]}
+            ]
+            stream = await self._get_async_client().chat(
+                model=self.model,
+                messages=messages,
+                options=options,
+                stream=True,
+                keep_alive=self.keep_alive
+            )
+            response_text, _ = await self._aaccumulate_streaming_response(stream, 'chat', on_token)
+
+            if response_text:
+                return response_text, "Successfully analyzed image"
+            return "", "Error: Empty response from vision model"
+
+        except (ResponseError, RequestError) as e:
+            self._invalidate_connection()
+            return "", f"Image analysis failed: Ollama API error: {e}"
+        except Exception as e:
+            self._evict_on_transport_error(e)
+            return "", f"Image analysis error: {type(e).__name__}: {e}"
+
+    async def aanalyze_images(self, prompt: str, images_data: List, system_prompt: str = "You are a helpful assistant.",
+                              temperature: float = 0.7, max_tokens: int = 500) -> List[Tuple[str, str]]:
+        """
+        逐张并发分析图片，总耗时接近单张耗时 / Analyze each image concurrently so total latency approaches a single request
+
+        服务端需设置 OLLAMA_NUM_PARALLEL 才能真正并行，客户端并发数同样读取该变量(默认4)。
+        The server needs OLLAMA_NUM_PARALLEL to run requests in parallel; the client cap reads the same variable (default 4).
+
+        Args:
+            prompt: 图片分析提示词
+            images_data: 图片数据列表 (List[torch.Tensor]或文件路径列表)
+            system_prompt: 系统提示词
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+
+        Returns:
+            List[Tuple[str, str]]: 与images_data顺序一致的 (分析结果, 状态信息) 列表
+        """
+        if not images_data:
+            return []
+
+        if not await self._aensure_connected():
+            return [("", "Error: Failed to connect to Ollama server")] * len(images_data)
+
+        semaphore = asyncio.Semaphore(NUM_PARALLEL)
+
+        async def analyze_one(image_data):
+            async with semaphore:
+                return await self.aanalyze_image(prompt, image_data, system_prompt, temperature, max_tokens)
+
+        return list(await asyncio.gather(*[analyze_one(image_data) for image_data in images_data]))
+
+    def analyze_images_concurrently(self, prompt: str, images_data: List, system_prompt: str = "You are a helpful assistant.",
+                                    temperature: float = 0.7, max_tokens: int = 500) -> List[Tuple[str, str]]:
+        """
+        aanalyze_images 的同步包装，可在ComfyUI事件循环线程中调用 / Sync wrapper around aanalyze_images, safe inside ComfyUI's loop thread
+
+        Args:
+            prompt: 图片分析提示词
+            images_data: 图片数据列表
+            system_prompt: 系统提示词
+            temperature: 生成温度 (0.0-2.0)
+            max_tokens: 最大生成token数
+
+        Returns:
+            List[Tuple[str, str]]: 与images_data顺序一致的 (分析结果, 状态信息) 列表
+        """
+        return _run_sync(self.aanalyze_images(prompt, images_data, system_prompt, temperature, max_tokens))
 
-    def _prepare_image_for_sdk(self, image_data) -> Optional[str]:
+    def _extract_response_text(self, response, kind: str = 'chat') -> str:
         """
-        为Ollama SDK准备图片 / Prepare image for Ollama SDK
+        从SDK响应或流式chunk中提取文本 / Extract text from an SDK response or streaming chunk
+
+        Args:
+            response: SDK响应对象或字典
+            kind: 'generate' 或 'chat'
+
+        Returns:
+            str: 文本内容
+        """
+        if kind == 'generate':
+            if isinstance(response, dict):
+                return response.get('response', '') or ''
+            return getattr(response, 'response', '') or ''
+
+        if isinstance(response, dict):
+            message = response.get('message', {})
+            if isinstance(message, dict):
+                return message.get('content', '') or ''
+            return ''
+        message = getattr(response, 'message', None)
+        return getattr(message, 'content', '') or ''
+
+    @staticmethod
+    def _extract_context(chunk) -> Optional[List[int]]:
+        """从generate的最后一个chunk中取出context / Extract the context ids from the final generate chunk"""
+        if chunk is None:
+            return None
+        if isinstance(chunk, dict):
+            return chunk.get('context')
+        return getattr(chunk, 'context', None)
+
+    def _accumulate_streaming_response(self, chunks: Iterable, kind: str = 'chat',
+                                       on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, Optional[object]]:
+        """
+        累积流式响应 / Accumulate a streaming response
+
+        Args:
+            chunks: SDK返回的流式迭代器
+            kind: 'generate' 或 'chat'
+            on_token: 每个文本片段的回调
+
+        Returns:
+            Tuple[str, Optional[object]]: (完整文本, 最后一个chunk，包含done和用量信息)
+        """
+        parts = []
+        last_chunk = None
+        for chunk in chunks:
+            last_chunk = chunk
+            piece = self._extract_response_text(chunk, kind)
+            if piece:
+                parts.append(piece)
+                if on_token is not None:
+                    on_token(piece)
+        return ''.join(parts), last_chunk
+
+    async def _aaccumulate_streaming_response(self, chunks: AsyncIterable, kind: str = 'chat',
+                                              on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, Optional[object]]:
+        """
+        累积异步流式响应 / Accumulate an async streaming response
+
+        Args:
+            chunks: SDK返回的异步流式迭代器
+            kind: 'generate' 或 'chat'
+            on_token: 每个文本片段的回调
+
+        Returns:
+            Tuple[str, Optional[object]]: (完整文本, 最后一个chunk)
+        """
+        parts = []
+        last_chunk = None
+        async for chunk in chunks:
+            last_chunk = chunk
+            piece = self._extract_response_text(chunk, kind)
+            if piece:
+                parts.append(piece)
+                if on_token is not None:
+                    on_token(piece)
+        return ''.join(parts), last_chunk
+
+    def _image_cache_key(self, image_data) -> Tuple[Optional[tuple], Optional[torch.Tensor]]:
+        """
+        计算已编码图片缓存的键 / Compute the encoded-image cache key
+
+        Args:
+            image_data: 图片数据 (torch.Tensor或文件路径或base64字符串)
+
+        Returns:
+            Tuple[Optional[tuple], Optional[torch.Tensor]]: (缓存键, 需要保持存活的基础张量)，不可缓存时键为None
+        """
+        settings = (self.use_base64, self.image_format, self.max_image_side, self.assume_01)
+        if isinstance(image_data, torch.Tensor):
+            # 切片视图每次都是新对象，按基础张量+视图位置+版本号识别 / Views are new objects each time, identify by base tensor, view layout and version
+            base = image_data._base if image_data._base is not None else image_data
+            return ('tensor', id(base), image_data.data_ptr(), tuple(image_data.shape), image_data.stride(),
+                    image_data.dtype, image_data._version) + settings, base
+        if isinstance(image_data, str) and len(image_data) < 4096:
+            try:
+                st = os.stat(image_data)
+            except (OSError, ValueError):
+                return None, None
+            return ('path', image_data, st.st_mtime_ns, st.st_size) + settings, None
+        return None, None
+
+    def _prepare_image_for_sdk(self, image_data) -> Optional[Union[str, bytes]]:
+        """
+        为Ollama SDK准备图片，命中缓存时直接复用 / Prepare image for Ollama SDK, reusing cached encodings
+
+        Args:
+            image_data: 图片数据 (torch.Tensor或文件路径或base64字符串)
+
+        Returns:
+            Optional[Union[str, bytes]]: use_base64时为base64字符串，否则为图片原始字节，失败时返回None
+        """
+        key, base = self._image_cache_key(image_data)
+        if key is None:
+            return self._encode_image_for_sdk(image_data)
+
+        with _ENCODED_IMAGE_LOCK:
+            entry = _ENCODED_IMAGE_CACHE.get(key)
+            # 基础张量被回收后id可能被复用，需确认仍是同一对象 / ids can be reused once the base is freed, confirm it is the same object
+            if entry is not None and (entry[0] is None or entry[0]() is base):
+                _ENCODED_IMAGE_CACHE.move_to_end(key)
+                return entry[1]
+
+        payload = self._encode_image_for_sdk(image_data)
+        if payload is not None:
+            with _ENCODED_IMAGE_LOCK:
+                _ENCODED_IMAGE_CACHE[key] = (weakref.ref(base) if base is not None else None, payload)
+                _ENCODED_IMAGE_CACHE.move_to_end(key)
+                while len(_ENCODED_IMAGE_CACHE) > ENCODED_IMAGE_CACHE_SIZE:
+                    _ENCODED_IMAGE_CACHE.popitem(last=False)
+        return payload
+
+    def _encode_image_for_sdk(self, image_data) -> Optional[Union[str, bytes]]:
+        """
+        将图片编码为SDK可接收的格式 / Encode an image into a format the SDK accepts
 
         Args:
             image_data: 图片数据 (torch.Tensor或文件路径或base64字符串)
 
         Returns:
-            Optional[str]: base64字符串或文件路径，失败时返回None
+            Optional[Union[str, bytes]]: use_base64时为base64字符串，否则为图片原始字节，失败时返回None
         """
         if not PIL_AVAILABLE:
             error_msg = "Error: PIL not available for image processing"
@@ -598,36 +1456,26 @@ class SiberiaOllamaSDKClient:
                 if self.use_base64:
                     return self._tensor_to_base64(image_data)
                 else:
-                    return self._tensor_to_temp_file(image_data)
+                    return self._tensor_to_bytes(image_data)
+
+            # 已编码的图片字节直接使用 / Already-encoded image bytes are used as-is
+            elif isinstance(image_data, (bytes, bytearray)):
+                return bytes(image_data)
 
             # 处理文件路径
             elif isinstance(image_data, str):
                 if os.path.exists(image_data):
                     # 验证文件是否为有效图片
                     if self._is_valid_image_file(image_data):
-                        if self.use_base64:
-                            # 将文件路径转换为base64
-                            with Image.open(image_data) as img_pil:
-                                return self._pil_to_base64(img_pil)
-                        else:
-                            return image_data
+                        return self._file_to_payload(image_data)
                     else:
                         print(f"Error: File exists but is not a valid image: {image_data}")
                         return None
                 else:
                     # 尝试解码base64
                     if self._is_base64_string(image_data):
-                        if self.use_base64:
-                            return image_data  # 直接返回base64字符串
-                        else:
-                            # 将base64转换为临时文件
-                            try:
-                                img_bytes = base64.b64decode(image_data)
-                                img_pil = Image.open(io.BytesIO(img_bytes))
-                                return self._pil_to_temp_file(img_pil)
-                            except Exception as e:
-                                print(f"Failed to decode base64 image: {e}")
-                                return None
+                        # SDK最终也发送base64，无需解码 / The SDK sends base64 on the wire anyway, pass it through undecoded
+                        return image_data
                     else:
                         print(f"Error: File does not exist and is not valid base64: {image_data}")
                         return None
@@ -640,17 +1488,50 @@ class SiberiaOllamaSDKClient:
             print(f"Error preparing image: {e}")
             return None
 
-    def _is_valid_image_file(self, file_path: str) -> bool:
+    # 无需转码即可直接上传的文件格式 / File formats uploaded as-is without re-encoding
+    _PASSTHROUGH_FORMATS = frozenset(('JPEG', 'PNG'))
+
+    def _file_to_payload(self, file_path: str) -> Optional[Union[str, bytes]]:
+        """
+        将图片文件转换为SDK负载，格式与设置一致且无需缩放时直接使用原始字节
+        Convert an image file to an SDK payload, using the raw bytes when it already has the configured format and needs no resize
+
+        Args:
+            file_path: 图片文件路径
+
+        Returns:
+            Optional[Union[str, bytes]]: base64字符串或原始字节
+        """
+        # Image.open 只解析文件头 / Image.open only parses the header
+        with Image.open(file_path) as img_pil:
+            if (img_pil.format not in self._PASSTHROUGH_FORMATS
+                    or img_pil.format.lower() != self.image_format
+                    or (self.max_image_side and max(img_pil.size) > self.max_image_side)):
+                img_pil.load()
+                return self._pil_to_base64(img_pil) if self.use_base64 else self._pil_to_bytes(img_pil)
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        return base64.b64encode(data).decode('ascii') if self.use_base64 else data
+
+    def _is_valid_image_file(self, file_path: str, strict: bool = False) -> bool:
         """
         检查文件是否为有效图片 / Check if file is a valid image
 
         Args:
             file_path: 文件路径
+            strict: 是否额外用PIL打开验证 / Also verify by opening with PIL
 
         Returns:
             bool: 是否为有效图片
         """
         try:
+            # 读取文件头判断格式，无需解码图片 / Sniff the header instead of decoding the image
+            with open(file_path, 'rb') as f:
+                if not _has_image_magic(f.read(12)):
+                    return False
+            if not strict:
+                return True
             with Image.open(file_path) as img:
                 # 尝试获取图片尺寸来验证文件完整性
                 _ = img.size
@@ -669,193 +1550,179 @@ class SiberiaOllamaSDKClient:
             bool: 是否为有效的base64字符串
         """
         try:
-            # 简单的长度检查和字符验证
-            if len(string) < 100:  # 通常base64图片都比较长
+            # 简单的长度检查，通常base64图片都比较长 / Length check, base64 images are long
+            if len(string) < 100 or len(string) % 4 != 0:
                 return False
-            base64.b64decode(string, validate=True)
-            return True
+
+            # 只检查首尾字符，完整解码交给后续流程 / Only check head and tail, the real decode handles the rest
+            if not _B64_HEAD_RE.fullmatch(string[:64]) or not _B64_TAIL_RE.fullmatch(string[-4:]):
+                return False
+
+            # 解码前16个字符并检查图片文件头 / Decode the first 16 chars and sniff the image signature
+            return _has_image_magic(base64.b64decode(string[:16]))
         except Exception:
             return False
 
-    def _tensor_to_base64(self, tensor: torch.Tensor) -> Optional[str]:
-        """将torch.Tensor转换为base64字符串，完全保持原始信息 / Convert torch.Tensor to base64 string preserving all original info"""
-        try:
-            # 验证tensor
-            if not isinstance(tensor, torch.Tensor):
-                print(f"Error: Expected torch.Tensor, got {type(tensor)}")
-                return None
-
-            if tensor.numel() == 0:
-                print("Error: Empty tensor provided")
-                return None
+    def _tensor_to_uint8_rgb(self, tensor: torch.Tensor) -> np.ndarray:
+        """
+        将 [H, W, C] 张量转换为uint8 RGB数组，不修改原始张量 / Convert an [H, W, C] tensor to a
+        uint8 RGB array without modifying the original tensor
 
-            # 验证形状 - 应该是 [H, W, C] 格式的单张图像
-            if len(tensor.shape) != 3:
-                print(f"Error: Expected 3D tensor [H, W, C], got {len(tensor.shape)}D tensor with shape {tensor.shape}")
-                return None
+        Args:
+            tensor: 1/3/4通道图像张量
 
-            h, w, c = tensor.shape
-            if c not in [1, 3, 4]:
-                print(f"Error: Invalid number of channels: {c}")
-                return None
+        Returns:
+            np.ndarray: [H, W, 3] 连续的uint8数组
+        """
+        h, w, c = tensor.shape
+        t = tensor.detach()
+        # 先截取RGB通道，减少后续计算和传输量 / Slice RGB out of RGBA first to shrink later work and transfers
+        if c > 3:
+            t = t[:, :, :3]
+        # 在GPU上完成量化，只传输uint8数据 / Quantize on the GPU so only uint8 data crosses PCIe
+        if not (self.use_gpu_preprocess and t.is_cuda):
+            t = t.cpu()
+
+        # 浮点数据按 [0, 1] 或 [0, 255] 缩放，只在新张量上原地截断 / Scale float data, clamping in place only on new tensors
+        if t.is_floating_point():
+            # ComfyUI约定浮点图像在 [0, 1]，跳过会触发GPU同步的 max() / ComfyUI floats are [0, 1] by convention, skip the syncing max()
+            if self.assume_01 or t.max() <= 1.0:
+                t = t.mul(255.0).clamp_(0, 255)
+            else:
+                t = t.clamp(0, 255)
+            t = t.to(torch.uint8)
+        elif t.dtype != torch.uint8:
+            t = t.to(torch.uint8)
+
+        t = t.cpu()
+        # 灰度图在CPU上扩展为RGB，只传输单通道 / Expand grayscale to RGB on the CPU so only one channel is transferred
+        if c == 1:
+            t = t.expand(h, w, 3)
+        return t.contiguous().numpy()
+
+    def _tensor_to_rgb_array(self, tensor: torch.Tensor) -> Optional[np.ndarray]:
+        """验证并将torch.Tensor转换为uint8 RGB数组，完全保持原始信息 / Validate and convert torch.Tensor to a uint8 RGB array preserving all original info"""
+        # 验证tensor
+        if not isinstance(tensor, torch.Tensor):
+            print(f"Error: Expected torch.Tensor, got {type(tensor)}")
+            return None
 
-            if h < 1 or w < 1:
-                print(f"Error: Invalid image dimensions: {h}x{w}")
-                return None
+        if tensor.numel() == 0:
+            print("Error: Empty tensor provided")
+            return None
 
-            
-            # 创建tensor的副本用于转换，避免修改原始数据
-            tensor_copy = tensor.clone().detach()
+        # 验证形状 - 应该是 [H, W, C] 格式的单张图像
+        if len(tensor.shape) != 3:
+            print(f"Error: Expected 3D tensor [H, W, C], got {len(tensor.shape)}D tensor with shape {tensor.shape}")
+            return None
 
-            # 处理数据类型和值范围，仅做必要的转换
-            if tensor_copy.dtype in [torch.float16, torch.float32, torch.float64]:
-                # 浮点数数据需要确定范围
-                if tensor_copy.max() <= 1.0:
-                    # 假设是 [0, 1] 范围的浮点数，转换为 [0, 255]
-                    tensor_copy = (tensor_copy * 255).clamp(0, 255)
-                else:
-                    # 假设已经是 [0, 255] 范围
-                    tensor_copy = tensor_copy.clamp(0, 255)
-                tensor_copy = tensor_copy.to(torch.uint8)
-            elif tensor_copy.dtype != torch.uint8:
-                # 其他整数类型转为 uint8
-                tensor_copy = tensor_copy.to(torch.uint8)
-
-            # 转换到CPU并转为numpy数组
-            img_np = tensor_copy.cpu().numpy()
-
-            # 处理通道格式，保持兼容性
-            if c == 1:
-                # 灰度图转RGB，复制通道
-                img_np = np.stack([img_np] * 3, axis=2)
-            elif c == 4:
-                # RGBA转RGB，保留RGB通道
-                img_np = img_np[:, :, :3]
-            elif c == 3:
-                # 已经是RGB，无需转换
-                pass
-
-            # 确保最终是3通道RGB
-            if img_np.shape[2] != 3:
-                print(f"❌ [SiberiaOllamaSDK] Final image doesn't have 3 channels: {img_np.shape}")
-                return None
+        h, w, c = tensor.shape
+        if c not in [1, 3, 4]:
+            print(f"Error: Invalid number of channels: {c}")
+            return None
 
-            # 创建PIL图像
-            img_pil = Image.fromarray(img_np.astype(np.uint8), mode='RGB')
+        if h < 1 or w < 1:
+            print(f"Error: Invalid image dimensions: {h}x{w}")
+            return None
 
-            # 转换为base64
-            return self._pil_to_base64(img_pil)
+        # 单次转换为uint8 RGB数组 / Convert to a uint8 RGB array in one pass
+        return self._tensor_to_uint8_rgb(tensor)
 
-        except Exception as e:
-            print(f"Error converting tensor to base64: {e}")
-            return None
+    def _array_to_pil(self, img_np: np.ndarray):
+        """由连续的uint8 RGB数组创建PIL图像 / Create a PIL image from a contiguous uint8 RGB array"""
+        # 直接映射连续的uint8缓冲区，避免 fromarray 的复制 / Map the contiguous uint8 buffer directly, avoiding fromarray's copy
+        return Image.frombuffer('RGB', (img_np.shape[1], img_np.shape[0]), img_np, 'raw', 'RGB', 0, 1)
 
-    def _tensor_to_temp_file(self, tensor: torch.Tensor) -> Optional[str]:
-        """将torch.Tensor转换为临时文件 / Convert torch.Tensor to temporary file"""
-        try:
-            # 验证tensor
-            if not isinstance(tensor, torch.Tensor):
-                print(f"Error: Expected torch.Tensor, got {type(tensor)}")
-                return None
+    def _encode_png_fast(self, img_np: np.ndarray) -> Optional[bytes]:
+        """
+        可用时用 imagecodecs 直接编码PNG / Encode PNG straight from the array with imagecodecs when available
 
-            if tensor.numel() == 0:
-                print("Error: Empty tensor provided")
-                return None
+        Args:
+            img_np: [H, W, 3] 连续的uint8数组
 
-            # 处理批次维度
-            if len(tensor.shape) == 5:
-                # [N, B, H, W, C] -> [N*H, W, C] 通过重塑
-                if tensor.shape[1] == 1:
-                    tensor = tensor.squeeze(1)  # [N, H, W, C]
-                print(f"Warning: 5D tensor detected, shape: {tensor.shape}")
-            elif len(tensor.shape) == 4:
-                # [B, H, W, C] -> [H, W, C] 取第一张图片
-                if tensor.shape[0] > 1:
-                    print(f"Warning: Multiple images in batch, using first image. Batch size: {tensor.shape[0]}")
-                tensor = tensor[0]
-            elif len(tensor.shape) == 2:
-                # [H, W] -> [H, W, 3] 灰度图
-                tensor = torch.stack([tensor] * 3, dim=-1)
-
-            # 验证最终形状
-            if len(tensor.shape) != 3:
-                print(f"Error: Invalid tensor shape after processing: {tensor.shape}")
-                return None
+        Returns:
+            Optional[bytes]: PNG字节，不适用时返回None，由PIL处理
+        """
+        if _png_encode is None or self.image_format != 'png':
+            return None
+        # 需要缩放的图片交给PIL / Images that need downscaling go through PIL
+        if self.max_image_side and max(img_np.shape[:2]) > self.max_image_side:
+            return None
+        data = _png_encode(img_np, level=1 if self.fast_encode else 6)
+        print(f"📸 [SiberiaOllamaSDK] Encoded image as png (imagecodecs): {len(data)} bytes")
+        return data
 
-            h, w, c = tensor.shape
-            if c not in [1, 3, 4]:
-                print(f"Error: Invalid number of channels: {c}")
+    def _tensor_to_base64(self, tensor: torch.Tensor) -> Optional[str]:
+        """将torch.Tensor转换为base64字符串 / Convert torch.Tensor to base64 string"""
+        try:
+            img_np = self._tensor_to_rgb_array(tensor)
+            if img_np is None:
                 return None
+            data = self._encode_png_fast(img_np)
+            if data is not None:
+                return base64.b64encode(data).decode('ascii')
+            return self._pil_to_base64(self._array_to_pil(img_np))
+        except Exception as e:
+            print(f"Error converting tensor to base64: {e}")
+            return None
 
-            if h < 1 or w < 1:
-                print(f"Error: Invalid image dimensions: {h}x{w}")
+    def _tensor_to_bytes(self, tensor: torch.Tensor) -> Optional[bytes]:
+        """将torch.Tensor转换为编码后的图片字节 / Convert torch.Tensor to encoded image bytes"""
+        try:
+            img_np = self._tensor_to_rgb_array(tensor)
+            if img_np is None:
                 return None
-
-            # 不限制图片尺寸，保持原始分辨率
-            print(f"📸 [SiberiaOllamaSDK] Processing image at original resolution: {h}x{w}x{c}")
-
-            # 转换数据类型
-            if tensor.dtype in [torch.float32, torch.float64, torch.float16]:
-                # 假设数据在[0,1]范围内
-                if tensor.max() <= 1.0:
-                    tensor = (tensor * 255).clamp(0, 255)
-                else:
-                    tensor = tensor.clamp(0, 255)
-                tensor = tensor.to(torch.uint8)
-
-            # 转换为numpy数组
-            img_np = tensor.cpu().numpy()
-
-            # 处理不同的通道格式
-            if len(img_np.shape) == 3:
-                if img_np.shape[2] == 1:  # 单通道
-                    img_np = np.concatenate([img_np] * 3, axis=2)
-                elif img_np.shape[2] == 4:  # RGBA -> RGB
-                    img_np = img_np[:, :, :3]
-                elif img_np.shape[2] > 3:  # 超过3通道
-                    img_np = img_np[:, :, :3]
-
-            # 创建PIL图像
-            img_pil = Image.fromarray(img_np.astype(np.uint8), mode='RGB')
-            return self._pil_to_temp_file(img_pil)
-
+            data = self._encode_png_fast(img_np)
+            if data is not None:
+                return data
+            return self._pil_to_bytes(self._array_to_pil(img_np))
         except Exception as e:
-            print(f"Error converting tensor to image: {e}")
+            print(f"Error converting tensor to bytes: {e}")
             return None
 
+    def _save_pil(self, img_pil, buffer: io.BytesIO):
+        """按image_format将PIL图像编码进缓冲区 / Encode a PIL image into the buffer using image_format"""
+        # 视觉模型内部会缩放到固定网格，先缩小超大图片 / VLMs resize to a fixed grid anyway, shrink oversized images first
+        if self.max_image_side and max(img_pil.size) > self.max_image_side:
+            img_pil.thumbnail((self.max_image_side, self.max_image_side), _BILINEAR)
+
+        if self.image_format == 'png':
+            # 无损PNG，本地/局域网上传时压缩收益很小 / Lossless PNG, heavy compression barely pays off on localhost/LAN
+            img_pil.save(buffer, format='PNG', optimize=False, compress_level=1 if self.fast_encode else 6)
+        elif self.image_format == 'webp':
+            img_pil.save(buffer, format='WEBP', quality=85, method=4)
+        else:
+            # JPEG体积更小且编码更快，不做第二遍优化 / JPEG is smaller and faster, skip the optimize pass
+            if img_pil.mode not in ('RGB', 'L'):
+                img_pil = img_pil.convert('RGB')
+            img_pil.save(buffer, format='JPEG', quality=90, optimize=False, subsampling=2)
+
     def _pil_to_base64(self, img_pil) -> Optional[str]:
         """将PIL图像转换为base64字符串 / Convert PIL image to base64 string"""
         try:
-            buffer = io.BytesIO()
-            # 使用PNG格式以保持最佳图像质量
-            img_pil.save(buffer, format='PNG', compress_level=6)
-            img_bytes = buffer.getvalue()
-            buffer.close()
+            with io.BytesIO() as buffer:
+                self._save_pil(img_pil, buffer)
 
-            return base64.b64encode(img_bytes).decode('utf-8')
+                # 直接编码内部缓冲区，避免复制 / Encode the internal buffer directly, avoiding a copy
+                with buffer.getbuffer() as view:
+                    print(f"📸 [SiberiaOllamaSDK] Encoded image as {self.image_format}: {view.nbytes} bytes")
+                    return base64.b64encode(view).decode('ascii')
         except Exception as e:
             print(f"Error converting PIL image to base64: {e}")
             return None
 
-    def _pil_to_temp_file(self, img_pil) -> Optional[str]:
-        """将PIL图像保存为临时文件 / Save PIL image as temporary file"""
+    def _pil_to_bytes(self, img_pil) -> Optional[bytes]:
+        """将PIL图像编码为内存中的字节，SDK可直接接收 / Encode PIL image to in-memory bytes the SDK accepts directly"""
         try:
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-            temp_file.close()
-            img_pil.save(temp_file.name, 'PNG')
-            return temp_file.name
+            with io.BytesIO() as buffer:
+                self._save_pil(img_pil, buffer)
+                data = buffer.getvalue()
+                print(f"📸 [SiberiaOllamaSDK] Encoded image as {self.image_format}: {len(data)} bytes")
+                return data
         except Exception as e:
-            print(f"Error saving PIL image to temp file: {e}")
+            print(f"Error converting PIL image to bytes: {e}")
             return None
 
-    def _cleanup_temp_file(self, file_path: str):
-        """清理临时文件 / Cleanup temporary file"""
-        if file_path and os.path.exists(file_path):
-            try:
-                os.unlink(file_path)
-            except OSError as e:
-                print(f"Warning: Failed to delete temp file {file_path}: {e}")
-
     @property
     def connected(self) -> bool:
         """连接状态 / Connection status"""
@@ -863,8 +1730,8 @@ class SiberiaOllamaSDKClient:
 
     @property
     def available_models(self) -> List[str]:
-        """可用模型列表 / Available models list"""
-        return self._available_models.copy()
+        """可用模型列表，只读使用；刷新时整体替换而非原地修改 / Available models list, read-only; refreshes replace it rather than mutate it"""
+        return self._available_models
 
     def to_connection_info(self) -> Dict:
         """
@@ -875,6 +1742,14 @@ class SiberiaOllamaSDKClient:
             "model": self.model,
             "timeout": self.timeout,
             "use_base64": self.use_base64,
+            "image_format": self.image_format,
+            "max_image_side": self.max_image_side,
+            "use_gpu_preprocess": self.use_gpu_preprocess,
+            "assume_01": self.assume_01,
+            "keep_alive": self.keep_alive,
+            "fast_encode": self.fast_encode,
+            "num_ctx": self.num_ctx,
+            "num_batch": self.num_batch,
             "available_models": self.available_models,
             "connected": self.connected
         }
@@ -887,15 +1762,98 @@ class SiberiaOllamaSDKClient:
         if not connection_info:
             return cls()
 
+        # 每次创建轻量实例，底层HTTP连接由 _CLIENT_POOL 共享 / A fresh lightweight instance each time, HTTP connections are shared through _CLIENT_POOL
         client = cls(
             server_url=connection_info.get("server_url", "http://127.0.0.1:11434"),
             model=connection_info.get("model", "llama2"),
             timeout=connection_info.get("timeout", 30),
-            use_base64=connection_info.get("use_base64", False)
+            use_base64=connection_info.get("use_base64", False),
+            image_format=connection_info.get("image_format", "jpeg"),
+            max_image_side=connection_info.get("max_image_side"),
+            use_gpu_preprocess=connection_info.get("use_gpu_preprocess", True),
+            assume_01=connection_info.get("assume_01", True),
+            keep_alive=connection_info.get("keep_alive"),
+            fast_encode=connection_info.get("fast_encode", True),
+            num_ctx=connection_info.get("num_ctx"),
+            num_batch=connection_info.get("num_batch")
         )
 
-        # 恢复连接状态
-        client._connected = connection_info.get("connected", False)
-        client._available_models = connection_info.get("available_models", [])
+        # 恢复连接器记录的连接状态，之后的失败由 _invalidate_connection 处理 / Restore the connector's recorded state, later failures go through _invalidate_connection
+        client._available_models = list(connection_info.get("available_models") or [])
+        client._connected = bool(connection_info.get("connected", False))
+
+        return client
+
+
+def close_pooled_clients() -> None:
+    """关闭所有共享的同步客户端连接 / Close every pooled sync client connection"""
+    with _POOL_LOCK:
+        clients = list(_CLIENT_POOL.values())
+        _CLIENT_POOL.clear()
+    for client in clients:
+        http_client = getattr(client, '_client', None)
+        if http_client is not None:
+            try:
+                http_client.close()
+            except Exception as e:
+                print(f"Warning: Failed to close Ollama client: {e}")
+
+
+atexit.register(close_pooled_clients)
+
+
+def refresh_cached_client(client: SiberiaOllamaSDKClient) -> bool:
+    """
+    测试连接并写入模型列表缓存 / Test connection and store the result in the model list cache
+
+    Args:
+        client: 要探测的客户端
+
+    Returns:
+        bool: 连接是否成功
+    """
+    return client.test_connection(force=True)
+
+
+def get_last_good_models(server_url: str) -> Optional[List[str]]:
+    """
+    获取最近一次成功的模型列表 / Get the last successfully fetched model list
+
+    Args:
+        server_url: 标准化后的Ollama服务器URL
 
-        return client
\ No newline at end of file
+    Returns:
+        Optional[List[str]]: 模型列表，从未成功连接时返回None
+    """
+    models = _LAST_GOOD_MODELS.get(server_url)
+    return list(models) if models is not None else None
+
+
+def get_cached_client(server_url: str, model: str = "llama2", timeout: int = 30,
+                      ttl: float = MODELS_CACHE_TTL, allow_stale: bool = False) -> Tuple[SiberiaOllamaSDKClient, bool]:
+    """
+    创建客户端并复用缓存的模型列表 / Create a client reusing the cached model list
+
+    Args:
+        server_url: Ollama服务器URL
+        model: 默认模型名称
+        timeout: 请求超时时间(秒)
+        ttl: 缓存有效期(秒)
+        allow_stale: 是否允许返回过期缓存，由调用方负责后台刷新
+
+    Returns:
+        Tuple[SiberiaOllamaSDKClient, bool]: (客户端, 缓存是否新鲜)
+    """
+    client = SiberiaOllamaSDKClient(server_url, model, timeout)
+    entry = _MODELS_CACHE.get(client.server_url)
+
+    if entry is not None:
+        timestamp, models, connected = entry
+        fresh = time.monotonic() - timestamp < ttl
+        if fresh or allow_stale:
+            client._available_models = list(models)
+            client._connected = connected
+            return client, fresh
+
+    refresh_cached_client(client)
+    return client, True
@@ -0,0 +1,44 @@
+"""
+ComfyUI-SiberiaNodes - Streaming progress helpers for Ollama nodes
+
+Author: siberiah0h
+Email: siberiah0h@gmail.com
+Technical Blog: www.dataeast.cn
+Last Updated: 2025-11-17
+"""
+
+import time
+
+# 部分结果推送到前端的最小间隔(秒) / Minimum interval between partial-result pushes to the UI (seconds)
+PROGRESS_INTERVAL = 0.25
+
+
+def make_progress_callback(unique_id):
+    """
+    创建流式回调，将部分回复推送到节点界面 / Create a streaming callback that pushes the partial reply to the node UI
+
+    Args:
+        unique_id: ComfyUI节点ID
+
+    Returns:
+        Optional[Callable[[str], None]]: 回调函数，当前环境不支持推送时返回None
+    """
+    if unique_id is None:
+        return None
+    try:
+        from server import PromptServer
+        send_progress_text = PromptServer.instance.send_progress_text
+    except (ImportError, AttributeError):
+        return None
+
+    parts = []
+    last_sent = [0.0]
+
+    def on_token(piece):
+        parts.append(piece)
+        now = time.monotonic()
+        if now - last_sent[0] >= PROGRESS_INTERVAL:
+            last_sent[0] = now
+            send_progress_text("".join(parts), unique_id)
+
+    return on_token
@@ -8,6 +8,7 @@ Last Updated: 2025-11-17
 """
 
 from .ollama_sdk_client import SiberiaOllamaSDKClient
+from .progress import make_progress_callback
 
 
 class SiberiaOllamaVisionNode:
@@ -57,6 +58,9 @@ class SiberiaOllamaVisionNode:
                     "tooltip": "语言 / Language"
                 }),
             },
+            "hidden": {
+                "unique_id": "UNIQUE_ID",
+            },
         }
 
     RETURN_TYPES = ("STRING",)
@@ -69,7 +73,7 @@ class SiberiaOllamaVisionNode:
         """ComfyUI动态更新机制 / ComfyUI Dynamic Update Mechanism"""
         return False
 
-    def analyze_images(self, connection, images, prompt, clear_history, temperature, max_tokens, language):
+    def analyze_images(self, connection, images, prompt, clear_history, temperature, max_tokens, language, unique_id=None):
         """分析多张图片 / Analyze Multiple Images"""
         try:
             # 清除历史记录 / Clear history if requested
@@ -107,7 +111,7 @@ class SiberiaOllamaVisionNode:
                 max_tokens = max(1, min(32768, max_tokens))
 
             # 多图片分析时的保守参数调整
-            if len(images.shape) > 4 and images.shape[0] > 1:  # 多张图片
+            if images.dim() >= 4 and images.shape[0] > 1:  # 多张图片
                 if temperature > 1.0:
                     print(f"⚠️ [SiberiaOllamaVision] Reducing temperature from {temperature} to 1.0 for multi-image analysis")
                     temperature = 1.0
@@ -138,7 +142,8 @@ class SiberiaOllamaVisionNode:
                 images_data=images_list,
                 system_prompt=system_prompt.strip(),
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                on_token=make_progress_callback(unique_id)
             )
 
             if response_text and not response_text.startswith("Error"):
@@ -169,57 +174,19 @@ class SiberiaOllamaVisionNode:
         try:
             import torch
 
-            if images is None:
+            if not isinstance(images, torch.Tensor) or images.dim() not in (4, 5):
                 return []
 
-            if not isinstance(images, torch.Tensor):
+            # 统一校验通道数和图像尺寸 / Validate channels and image size once
+            height, width, channels = images.shape[-3:]
+            if channels not in [1, 3, 4] or height < 1 or width < 1:
                 return []
 
-            images_list = []
-
-            # 处理 5D 张量 [N, B, H, W, C] - 多图像堆叠格式
-            if len(images.shape) == 5:
-                num_images, batch_size, height, width, channels = images.shape
-
-                # 验证通道数
-                if channels not in [1, 3, 4]:
-                    return []
-
-                # 验证图像尺寸
-                if height < 1 or width < 1:
-                    return []
-
-                # 提取每个图像的 [H, W, C] 格式
-                for i in range(num_images):
-                    if batch_size == 1:
-                        # [1, H, W, C] -> [H, W, C]
-                        single_image = images[i, 0]  # 移除批次维度
-                    else:
-                        # 如果批次大小 > 1，取第一张
-                        single_image = images[i, 0]  # 取批次中的第一张
-
-                    images_list.append(single_image)
-
-            # 处理 4D 张量 [B, H, W, C] - 标准图像批次
-            elif len(images.shape) == 4:
-                batch_size, height, width, channels = images.shape
-
-                # 验证通道数
-                if channels not in [1, 3, 4]:
-                    return []
-
-                # 验证图像尺寸
-                if height < 1 or width < 1:
-                    return []
-
-                # 提取每张图像 [H, W, C]
-                for i in range(batch_size):
-                    single_image = images[i]
-                    images_list.append(single_image)
-
-            else:
-                return []
-            return images_list
+            # 5D [N, B, H, W, C] 取每组批次中的第一张，4D [B, H, W, C] 取每张
+            # 5D takes the first frame of each group, 4D takes every frame
+            if images.dim() == 5:
+                images = images[:, 0]
+            return list(images.unbind(0))
 
         except Exception as e:
             return []
\ No newline at end of file
@@ -7,6 +7,7 @@ Technical Blog: www.dataeast.cn
 Last Updated: 2025-11-15
 """
 
+import hashlib
 import json
 import time
 from .config_manager import manager
@@ -54,38 +55,66 @@ NODE_DISPLAY_NAME_MAPPINGS.update(IMAGE_LOADER_NODE_DISPLAY_NAME_MAPPINGS)
 # 注册JavaScript扩展文件 / Register JavaScript extension file
 WEB_DIRECTORY = "./web"
 
-@PromptServer.instance.routes.get("/siberia_ollama.js")
-async def get_siberia_ollama_js(request):
-    """提供Siberia Ollama JavaScript文件 / Serve Siberia Ollama JavaScript file"""
-    js_path = pathlib.Path(__file__).parent / "web" / "js" / "siberiaOllama.js"
-    if js_path.exists():
-        with open(js_path, 'r', encoding='utf-8') as f:
-            js_content = f.read()
-        return web.Response(text=js_content, content_type='application/javascript')
-    else:
-        return web.Response(text="console.error('Siberia Ollama JS file not found at expected location');", content_type='application/javascript')
-
-@PromptServer.instance.routes.get("/siberia_multi_image_loader.js")
-async def get_siberia_multi_image_loader_js(_):
-    """提供Siberia Multi Image Loader JavaScript文件 / Serve Siberia Multi Image Loader JavaScript file"""
-    js_path = pathlib.Path(__file__).parent / "web" / "js" / "siberiaMultiImageLoader.js"
-    if js_path.exists():
-        with open(js_path, 'r', encoding='utf-8') as f:
-            js_content = f.read()
-        return web.Response(text=js_content, content_type='application/javascript')
-    else:
-        return web.Response(text="console.error('Siberia Multi Image Loader JS file not found at expected location');", content_type='application/javascript')
-
-@PromptServer.instance.routes.get("/siberia_dynamic_inputs.js")
-async def get_siberia_dynamic_inputs_js(_):
-    """提供Siberia Dynamic Inputs JavaScript文件 / Serve Siberia Dynamic Inputs JavaScript file"""
-    js_path = pathlib.Path(__file__).parent / "web" / "js" / "siberiaDynamicInputs.js"
-    if js_path.exists():
-        with open(js_path, 'r', encoding='utf-8') as f:
-            js_content = f.read()
-        return web.Response(text=js_content, content_type='application/javascript')
-    else:
-        return web.Response(text="console.error('Siberia Dynamic Inputs JS file not found at expected location');", content_type='application/javascript')
+# 启动时读入JS文件并计算ETag，请求时不再访问磁盘 / Read JS files and their ETags once at import, no disk access per request
+_JS_DIR = pathlib.Path(__file__).parent / "web" / "js"
+_JS_CACHE = {}
+_JS_ETAG = {}
+
+# (路由, 文件名, 显示名称) / (route, file name, display label)
+_JS_ROUTES = (
+    ("/siberia_ollama.js", "siberiaOllama.js", "Siberia Ollama"),
+    ("/siberia_multi_image_loader.js", "siberiaMultiImageLoader.js", "Siberia Multi Image Loader"),
+    ("/siberia_dynamic_inputs.js", "siberiaDynamicInputs.js", "Siberia Dynamic Inputs"),
+)
+
+for _, _js_name, _ in _JS_ROUTES:
+    _js_path = _JS_DIR / _js_name
+    if _js_path.exists():
+        _JS_CACHE[_js_name] = _js_path.read_bytes()
+        _JS_ETAG[_js_name] = f'"{hashlib.blake2b(_JS_CACHE[_js_name], digest_size=16).hexdigest()}"'
+
+
+def _serve_js(request, js_name, label):
+    """
+    从内存提供JS文件，支持If-None-Match返回304 / Serve a JS file from memory, answering If-None-Match with 304
+
+    Args:
+        request: aiohttp请求
+        js_name: web/js 下的文件名
+        label: 文件缺失时错误信息中的名称
+
+    Returns:
+        web.Response: JS响应
+    """
+    body = _JS_CACHE.get(js_name)
+    if body is None:
+        return web.Response(text=f"console.error('{label} JS file not found at expected location');", content_type='application/javascript')
+
+    etag = _JS_ETAG[js_name]
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type='application/javascript', charset='utf-8', headers=headers)
+
+
+def _register_js_route(route, js_name, label):
+    """
+    注册一个从内存提供JS文件的路由 / Register a route serving one JS file from memory
+
+    Args:
+        route: URL路径
+        js_name: web/js 下的文件名
+        label: 文件缺失时错误信息中的名称
+    """
+    async def handler(request):
+        return _serve_js(request, js_name, label)
+
+    handler.__name__ = f"get_{pathlib.Path(route).stem}_js"
+    PromptServer.instance.routes.get(route)(handler)
+
+
+for _route, _js_name, _label in _JS_ROUTES:
+    _register_js_route(_route, _js_name, _label)
 
 # 注册自定义资源路径 / Register custom asset path
 try:
@@ -0,0 +1,50 @@
+"""
+ComfyUI-SiberiaNodes - Image file decoding with optional accelerated backends
+
+Author: siberiah0h
+Email: siberiah0h@gmail.com
+Technical Blog: www.dataeast.cn
+Last Updated: 2025-11-17
+"""
+
+import numpy as np
+from PIL import Image
+
+try:
+    # 可选的 PyTurboJPEG，SIMD解码JPEG / Optional PyTurboJPEG for SIMD JPEG decoding
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _TURBOJPEG = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    # 未安装包或缺少 libturbojpeg 动态库 / Package missing or libturbojpeg not found
+    _TURBOJPEG = None
+
+# 交给 turbojpeg 解码的文件后缀 / File suffixes decoded by turbojpeg
+_JPEG_SUFFIXES = ('.jpg', '.jpeg', '.jfif')
+
+
+def decode_image_rgb(path: str) -> np.ndarray:
+    """
+    将图片文件解码为 [H, W, 3] uint8 RGB数组 / Decode an image file into an [H, W, 3] uint8 RGB array
+
+    JPEG优先使用 turbojpeg 直接输出RGB，其余格式或解码失败时使用PIL。
+    JPEG goes through turbojpeg straight to RGB; other formats, or files it cannot decode, use PIL.
+
+    Args:
+        path: 图片文件路径
+
+    Returns:
+        np.ndarray: [H, W, 3] uint8数组
+    """
+    if _TURBOJPEG is not None and path.lower().endswith(_JPEG_SUFFIXES):
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            return _TURBOJPEG.decode(data, pixel_format=TJPF_RGB)
+        except Exception:
+            # CMYK等 turbojpeg 不支持的JPEG交给PIL / JPEGs turbojpeg rejects (e.g. CMYK) fall back to PIL
+            pass
+
+    with Image.open(path) as img:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        return np.asarray(img)
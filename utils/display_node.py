@@ -13,6 +13,33 @@ import json
 from typing import Any, Dict, List, Tuple, Optional
 from .utils import any_type
 
+try:
+    # 可选的 orjson，C实现的JSON编码 / Optional orjson, a C-implemented JSON encoder
+    import orjson
+    _ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    orjson = None
+
+
+def _passthrough(value: Any) -> Any:
+    """原样返回 / Return the value unchanged"""
+    return value
+
+
+# 按精确类型分派的转换函数，字符串和列表原样返回，基本类型转为字符串
+# Converters dispatched on exact type: strings and lists pass through, primitives become strings
+_DISPLAY_DISPATCH = {
+    str: _passthrough,
+    list: _passthrough,
+    int: str,
+    float: str,
+    bool: str,
+}
+
+# 最近一次工作流的节点索引：(节点列表, 节点数, id→节点)，同一次执行中的多个展示节点共用
+# Node index of the latest workflow: (nodes list, node count, id -> node), shared by display nodes within one run
+_NODE_INDEX_CACHE: Optional[Tuple[List[Dict], int, Dict[str, Dict]]] = None
+
 
 class SiberiaUniversalDisplayNode:
     """
@@ -104,18 +131,15 @@ class SiberiaUniversalDisplayNode:
         Returns:
             转换后的字符串列表 / Converted string list
         """
-        display_values = []
-        
-        for value in input_data:
-            converted = self._convert_single_value(value)
-            
-            # 如果转换结果是列表，直接使用（保持原有行为）
-            if isinstance(converted, list):
-                display_values = converted
-            else:
-                display_values.append(converted)
-        
-        return display_values
+        converted = [self._convert_single_value(value) for value in input_data]
+
+        # 列表结果替换此前累计的内容，其后的值继续追加（保持原有行为）
+        # A list result replaces everything before it and later values are appended (original behaviour)
+        for i in range(len(converted) - 1, -1, -1):
+            if isinstance(converted[i], list):
+                return converted[i] + converted[i + 1:]
+
+        return converted
 
     def _convert_single_value(self, value: Any) -> Any:
         """
@@ -129,21 +153,19 @@ class SiberiaUniversalDisplayNode:
             转换后的值 / Converted value
         """
         try:
-            # 字符串直接返回
-            if isinstance(value, str):
-                return value
-            
-            # 列表直接返回（用于替换整个显示列表）
-            elif isinstance(value, list):
-                return value
-            
-            # 基本类型转为字符串
-            elif isinstance(value, (int, float, bool)):
-                return str(value)
-            
+            # 精确类型直接查表 / Exact types resolve with a single table lookup
+            handler = _DISPLAY_DISPATCH.get(type(value))
+            if handler is not None:
+                return handler(value)
+
+            # 子类按原有顺序匹配（列表用于替换整个显示列表）
+            # Subclasses keep the original order (lists replace the whole display list)
+            for base, handler in _DISPLAY_DISPATCH.items():
+                if isinstance(value, base):
+                    return handler(value)
+
             # 复杂类型尝试JSON序列化
-            else:
-                return self._serialize_to_json(value)
+            return self._serialize_to_json(value)
                 
         except Exception:
             # 转换失败时使用字符串表示
@@ -160,6 +182,13 @@ class SiberiaUniversalDisplayNode:
         Returns:
             JSON字符串 / JSON string
         """
+        if orjson is not None:
+            try:
+                return orjson.dumps(value, option=_ORJSON_OPTIONS).decode("utf-8")
+            except Exception:
+                # orjson 不支持的类型交给标准库 / Types orjson rejects fall back to the stdlib
+                pass
+
         try:
             return json.dumps(value, ensure_ascii=False, indent=2)
         except Exception:
@@ -229,8 +258,21 @@ class SiberiaUniversalDisplayNode:
         Returns:
             找到的节点或None / Found node or None
         """
+        global _NODE_INDEX_CACHE
+
         nodes = workflow.get("nodes", [])
-        return next((node for node in nodes if str(node["id"]) == node_id), None)
+        cache = _NODE_INDEX_CACHE
+        # 持有节点列表引用，避免id被复用误判 / Keep the list itself so a recycled id cannot match
+        if cache is None or cache[0] is not nodes or cache[1] != len(nodes):
+            cache = (nodes, len(nodes), {str(node["id"]): node for node in nodes})
+            _NODE_INDEX_CACHE = cache
+
+        node = cache[2].get(node_id)
+        # 节点id被前端修改时重建索引 / Rebuild if a node's id was changed in place
+        if node is not None and str(node["id"]) != node_id:
+            _NODE_INDEX_CACHE = None
+            return self._find_node_in_workflow(workflow, node_id)
+        return node
 
     def _build_response(self, display_values: List[str]) -> Dict[str, Any]:
         """
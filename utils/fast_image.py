@@ -0,0 +1,68 @@
+"""
+ComfyUI-SiberiaNodes - Fast image array conversion kernels
+
+Author: siberiah0h
+Email: siberiah0h@gmail.com
+Technical Blog: www.dataeast.cn
+Last Updated: 2025-11-17
+"""
+
+import os
+import numpy as np
+
+# numba 内核需显式开启（SIBERIA_NUMBA=1）：首次编译或加载缓存需数秒，而numpy实现只需毫秒
+# The numba kernel is opt-in (SIBERIA_NUMBA=1): compiling or loading it takes seconds, the numpy path takes milliseconds
+NUMBA_AVAILABLE = False
+if os.environ.get("SIBERIA_NUMBA", "").lower() in ("1", "true", "yes"):
+    try:
+        from numba import njit, prange
+        NUMBA_AVAILABLE = True
+    except ImportError:
+        print("⚠️ [SiberiaFastImage] SIBERIA_NUMBA is set but numba is not installed, using numpy")
+
+
+if NUMBA_AVAILABLE:
+    from numba import types
+
+    # 显式签名在装饰时即编译；PIL 导出的数组是只读的，因此同时声明只读输入
+    # Explicit signatures compile at decoration; PIL-backed arrays are read-only, so a read-only input is declared too
+    _U8_HWC = types.Array(types.uint8, 3, 'C')
+    _U8_HWC_RO = types.Array(types.uint8, 3, 'C', readonly=True)
+    _F32_BHWC = types.Array(types.float32, 4, 'C')
+
+    try:
+        @njit([types.void(_U8_HWC, _F32_BHWC), types.void(_U8_HWC_RO, _F32_BHWC)],
+              parallel=True, fastmath=True, cache=True, nogil=True, boundscheck=False)
+        def _u8_to_f32_bhwc_kernel(src, dst):
+            """按行并行，一次遍历完成缩放和写入批次维度 / Row-parallel single pass scaling into the batch axis"""
+            height, width, channels = src.shape
+            scale = np.float32(1.0 / 255.0)
+            for y in prange(height):
+                for x in range(width):
+                    for c in range(channels):
+                        dst[0, y, x, c] = src[y, x, c] * scale
+    except Exception as e:
+        print(f"⚠️ [SiberiaFastImage] Numba compilation failed, using numpy fallback: {e}")
+        NUMBA_AVAILABLE = False
+
+
+def u8_to_f32_bhwc(src: np.ndarray) -> np.ndarray:
+    """
+    将 [H, W, C] uint8 图像转换为 [1, H, W, C] float32 (0-1) / Convert an [H, W, C] uint8 image to [1, H, W, C] float32 in [0, 1]
+
+    只分配一次输出，一次遍历像素；默认使用numpy，开启 SIBERIA_NUMBA 时使用等价的 numba 内核。
+    Allocates the output once and walks the pixels once; numpy by default, an equivalent numba kernel with SIBERIA_NUMBA.
+
+    Args:
+        src: [H, W, C] uint8数组
+
+    Returns:
+        np.ndarray: [1, H, W, C] float32数组
+    """
+    height, width, channels = src.shape
+    out = np.empty((1, height, width, channels), dtype=np.float32)
+    if NUMBA_AVAILABLE and src.dtype == np.uint8:
+        _u8_to_f32_bhwc_kernel(np.ascontiguousarray(src), out)
+    else:
+        np.multiply(src, np.float32(1.0 / 255.0), out=out[0])
+    return out
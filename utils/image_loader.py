@@ -8,12 +8,70 @@ Last Updated: 2025-11-17
 """
 
 import torch
-import numpy as np
 import os
-from PIL import Image
+import time
+from typing import List
 import folder_paths
 
 
+# 是否输出逐项调试日志，通过 SIBERIA_VERBOSE=1 开启 / Per-input debug logging, enabled with SIBERIA_VERBOSE=1
+VERBOSE = os.environ.get("SIBERIA_VERBOSE", "").lower() in ("1", "true", "yes")
+
+# 输入目录图片列表缓存，按目录修改时间和TTL失效 / Input directory image list cache, invalidated by directory mtime and TTL
+_INPUT_FILES_CACHE = {"dir": None, "mtime_ns": 0, "ts": 0.0, "files": []}
+INPUT_FILES_TTL = 2.0
+
+
+def _list_input_images(input_dir: str) -> List[str]:
+    """
+    列出输入目录中的图片文件（已排序） / List image files in the input directory, sorted
+
+    短时间内重复调用且目录未变时直接返回缓存结果。
+    Repeated calls within the TTL return the cached result while the directory is unchanged.
+
+    Args:
+        input_dir: ComfyUI输入目录
+
+    Returns:
+        List[str]: 排序后的图片文件名列表
+    """
+    mtime_ns = os.stat(input_dir).st_mtime_ns
+    now = time.monotonic()
+    cache = _INPUT_FILES_CACHE
+    if (cache["dir"] == input_dir and cache["mtime_ns"] == mtime_ns
+            and now - cache["ts"] < INPUT_FILES_TTL):
+        return cache["files"]
+
+    # scandir 一次遍历即可得到文件类型，无需逐个stat / scandir yields entry types in one pass, no per-file stat
+    with os.scandir(input_dir) as it:
+        files = [entry.name for entry in it if entry.is_file()]
+    files = sorted(folder_paths.filter_files_content_types(files, ["image"]))
+
+    _INPUT_FILES_CACHE.update(dir=input_dir, mtime_ns=mtime_ns, ts=now, files=files)
+    return files
+
+
+def _decode_to_tensor(path: str) -> torch.Tensor:
+    """
+    解码图片文件为 [1, H, W, 3] tensor / Decode an image file into a [1, H, W, 3] tensor
+
+    Args:
+        path: 图片文件路径
+
+    Returns:
+        torch.Tensor: [1, H, W, 3] float32 tensor
+    """
+    # 首次加载图片时才导入解码后端 / Import the decode backends on the first image load only
+    from .decode import decode_image_rgb
+    from .fast_image import u8_to_f32_bhwc
+
+    # Decode to RGB uint8 (turbojpeg for JPEG when available) / 解码为RGB uint8（可用时JPEG走turbojpeg）
+    rgb = decode_image_rgb(path)
+
+    # 一次遍历转换为带批次维度的float32数组 / Convert to float32 with a batch axis in one pass
+    return torch.from_numpy(u8_to_f32_bhwc(rgb))
+
+
 class SiberiaMultiImageLoaderNode:
     """
     Siberia Multi Image Loader - Enhanced multi-image input node with dynamic input support
@@ -59,7 +117,8 @@ class SiberiaMultiImageLoaderNode:
             images = []
             valid_count = 0
 
-            print(f"🎯 [SiberiaMultiImageLoader] Processing {input_count} image inputs")
+            if VERBOSE:
+                print(f"🎯 [SiberiaMultiImageLoader] Processing {input_count} image inputs")
 
             for i in range(1, input_count + 1):
                 input_key = f"image_{i}"
@@ -67,16 +126,35 @@ class SiberiaMultiImageLoaderNode:
                 if tensor is not None and len(tensor.shape) == 4:
                     images.append(tensor)
                     valid_count += 1
-                    print(f"  ✓ {input_key}: image processed (shape: {tensor.shape})")
-                else:
+                    if VERBOSE:
+                        print(f"  ✓ {input_key}: image processed (shape: {tensor.shape})")
+                elif VERBOSE:
                     print(f"  ❌ {input_key}: Invalid or missing tensor")
 
             if not images:
                 print(f"⚠️ [SiberiaMultiImageLoader] No valid images found")
                 return (torch.zeros((1, 64, 64, 3)),)  # Return default tensor
 
-            # Always output images list - stack all images into a single tensor
-            stacked_tensor = torch.stack(images, dim=0)
+            # 以第一张图片的 [H, W, C] 为基准，跳过尺寸不一致的输入；批次大小可以不同
+            # Use the first image's [H, W, C] as canonical and skip mismatched inputs; batch sizes may differ
+            frame_shape = images[0].shape[1:]
+            matched = []
+            for t in images:
+                if t.shape[1:] == frame_shape:
+                    matched.append(t)
+                else:
+                    print(f"  ⚠️ Skipping image with shape {tuple(t.shape)}, expected [B, {', '.join(map(str, frame_shape))}]")
+            images = matched
+
+            # Always output images list - concatenate all frames into one pre-allocated [total_B, H, W, C] tensor
+            # 一次分配连续内存并按批次偏移原地拷贝 / One contiguous allocation filled in place at batch offsets
+            total_b = sum(t.shape[0] for t in images)
+            stacked_tensor = torch.empty((total_b, *frame_shape), dtype=images[0].dtype, device=images[0].device)
+            offset = 0
+            for t in images:
+                b = t.shape[0]
+                stacked_tensor[offset:offset + b].copy_(t)
+                offset += b
             print(f"✅ [SiberiaMultiImageLoader] Stacked {len(images)} images (shape: {stacked_tensor.shape})")
             return (stacked_tensor,)
 
@@ -94,12 +172,10 @@ class SiberiaImageLoaderNode:
 
     @classmethod
     def INPUT_TYPES(cls):
-        input_dir = folder_paths.get_input_directory()
-        files = [f for f in os.listdir(input_dir) if os.path.isfile(os.path.join(input_dir, f))]
-        files = folder_paths.filter_files_content_types(files, ["image"])
+        files = _list_input_images(folder_paths.get_input_directory())
         return {
             "required": {
-                "image": (sorted(files), {
+                "image": (list(files), {
                     "image_upload": True,
                     "tooltip": "选择图片 / Select Image"
                 }),
@@ -111,6 +187,15 @@ class SiberiaImageLoaderNode:
     FUNCTION = "load_image"
     CATEGORY = "Siberia Nodes/Image"
 
+    @classmethod
+    def IS_CHANGED(cls, image):
+        # 文件未修改时跳过重新执行 / Skip re-execution while the file is unchanged
+        try:
+            st = os.stat(folder_paths.get_annotated_filepath(image))
+        except (OSError, TypeError):
+            return image
+        return (st.st_mtime_ns, st.st_size)
+
     def load_image(self, image):
         try:
             if not image:
@@ -122,22 +207,10 @@ class SiberiaImageLoaderNode:
 
             try:
                 # Load image / 加载图片
-                img = Image.open(image_path)
-
-                # Convert to RGB / 转换为RGB
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                # Convert to numpy array / 转换为numpy数组
-                img_array = np.array(img).astype(np.float32) / 255.0
-
-                # Add batch dimension / 添加批次维度
-                img_array = np.expand_dims(img_array, axis=0)
-
-                # Convert to tensor / 转换为tensor
-                image_tensor = torch.from_numpy(img_array)
+                image_tensor = _decode_to_tensor(image_path)
 
-                info_msg = f"Successfully loaded image / 成功加载图片: {image_path} (Size: {img.size}, Mode: {img.mode})"
+                height, width = image_tensor.shape[1], image_tensor.shape[2]
+                info_msg = f"Successfully loaded image / 成功加载图片: {image_path} (Size: {(width, height)}, Mode: RGB)"
 
                 return (image_tensor, info_msg)
 